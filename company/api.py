@@ -1,5 +1,5 @@
 from rest_framework import generics, permissions
-from .models import Company, CompanyManager
+from .models import Company, CompanyManager, CompanyOffice
 from .serializers import (
     CompanySerializer,
     CompanyUpdateSerializer,
@@ -7,11 +7,21 @@ from .serializers import (
 )
 from .permissions import IsManager
 from .mixins import IsManagerMixins
+from job_board.conditional import ConditionalRetrieveMixin, related_state
+from job_board.prefetch import PrefetchPlanViewMixin
+from job_board.response_cache import COMPANY_DETAIL, CachedRetrieveMixin
 
 
-class CompanyRetrieveUpdateAPIView(generics.RetrieveUpdateAPIView):
+class CompanyRetrieveUpdateAPIView(
+    ConditionalRetrieveMixin,
+    CachedRetrieveMixin,
+    PrefetchPlanViewMixin,
+    generics.RetrieveUpdateAPIView,
+):
     queryset = Company.objects.all()
+    cache_prefix = COMPANY_DETAIL
     serializer_class = CompanySerializer
+    conditional_annotations = related_state("offices", CompanyOffice, "company")
 
     def get_serializer_class(self):
         if self.request.method in ["PUT", "PATCH"]:
@@ -24,7 +34,9 @@ class CompanyRetrieveUpdateAPIView(generics.RetrieveUpdateAPIView):
         return [permissions.AllowAny()]
 
 
-class CompanyManagerListCreateAPIView(IsManagerMixins, generics.ListCreateAPIView):
+class CompanyManagerListCreateAPIView(
+    PrefetchPlanViewMixin, IsManagerMixins, generics.ListCreateAPIView
+):
     queryset = CompanyManager.objects.all()
     serializer_class = CompanyManagerSerializer
 
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("company", "0004_alter_companymanager_company"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="companymanager",
+            index=models.Index(
+                fields=["company", "-created_at", "-id"],
+                name="company_manager_keyset_idx",
+            ),
+        ),
+    ]
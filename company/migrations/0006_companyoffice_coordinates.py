@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+BACKFILL_COORDINATES = """
+UPDATE company_companyoffice SET latitude = city.latitude, longitude = city.longitude
+FROM cities_light_city AS city
+WHERE company_companyoffice.city_id = city.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cities_light", "0011_alter_city_country_alter_city_region_and_more"),
+        ("company", "0005_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="companyoffice",
+            name="latitude",
+            field=models.DecimalField(
+                blank=True, decimal_places=5, editable=False, max_digits=8, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="companyoffice",
+            name="longitude",
+            field=models.DecimalField(
+                blank=True, decimal_places=5, editable=False, max_digits=8, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="companyoffice",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="company_office_coords_idx"
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_COORDINATES, migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from cities_light.models import City
+from cities_light.signals import city_items_post_import, country_items_post_import
+from job_board.response_cache import COMPANY_DETAIL, invalidate_detail
 
 User = get_user_model()
 
@@ -14,9 +20,28 @@ class CompanyOffice(models.Model):
     company = models.ForeignKey(
         "Company", on_delete=models.CASCADE, related_name="offices"
     )
+    # copied from `city` so radius searches can prune on an index of this table
+    latitude = models.DecimalField(
+        max_digits=8, decimal_places=5, null=True, blank=True, editable=False
+    )
+    longitude = models.DecimalField(
+        max_digits=8, decimal_places=5, null=True, blank=True, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["latitude", "longitude"], name="company_office_coords_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.latitude = self.city.latitude if self.city else None
+        self.longitude = self.city.longitude if self.city else None
+        return super().save(*args, **kwargs)
+
     def get_company(self):
         return self.company
 
@@ -61,8 +86,62 @@ class CompanyManager(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["company", "-created_at", "-id"],
+                name="company_manager_keyset_idx",
+            ),
+        ]
+
     def get_company(self):
         return self.company
 
     def __str__(self):
         return self.company.name + " - " + self.manager.email
+
+
+@receiver(city_items_post_import)
+@receiver(country_items_post_import)
+def mark_imported_place(sender, instance, **kwargs):
+    # saved right after by the cities_light import, which touches every
+    # place; offices and job cards are synced once afterwards instead
+    instance._imported = True
+
+
+def skip_place_refresh(instance, created, raw):
+    # a new place has no offices yet
+    return raw or created or getattr(instance, "_imported", False)
+
+
+def copy_city_coordinates(offices):
+    """
+    Copy the coordinates of their city to `offices` in one statement.
+    Returns the number of offices updated.
+    """
+    city = City.objects.filter(pk=OuterRef("city_id"))
+    return offices.update(
+        latitude=Subquery(city.values("latitude")),
+        longitude=Subquery(city.values("longitude")),
+    )
+
+
+@receiver(post_save, sender=City)
+def sync_office_coordinates(sender, instance, created, raw=False, **kwargs):
+    if skip_place_refresh(instance, created, raw):
+        return
+    CompanyOffice.objects.filter(city=instance).update(
+        latitude=instance.latitude, longitude=instance.longitude
+    )
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_detail(sender, instance, **kwargs):
+    invalidate_detail(COMPANY_DETAIL, instance.pk)
+
+
+@receiver(post_save, sender=CompanyOffice)
+@receiver(post_delete, sender=CompanyOffice)
+def invalidate_office_company_detail(sender, instance, **kwargs):
+    invalidate_detail(COMPANY_DETAIL, instance.company_id)
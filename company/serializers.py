@@ -1,6 +1,8 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Company, CompanyOffice, CompanyManager
 from cities_light.models import Country, City
+from job_board.prefetch import PrefetchPlanMixin
 
 
 class CitySerializer(serializers.ModelSerializer):
@@ -15,7 +17,9 @@ class CountrySerializer(serializers.ModelSerializer):
         fields = ["id", "name"]
 
 
-class CompanyOfficeSerializer(serializers.ModelSerializer):
+class CompanyOfficeSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
+    select_related = ("city", "country")
+
     city_name = serializers.CharField(source="city.name", read_only=True)
     country_name = serializers.CharField(source="country.name", read_only=True)
 
@@ -33,7 +37,14 @@ class CompanyOfficeSerializer(serializers.ModelSerializer):
         ]
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(PrefetchPlanMixin, serializers.ModelSerializer):
+    prefetch_related = (
+        Prefetch(
+            "offices",
+            queryset=CompanyOffice.objects.select_related("city", "country"),
+        ),
+    )
+
     offices = CompanyOfficeSerializer(many=True, read_only=True)
     number_of_employees = serializers.CharField(
         source="get_number_of_employees_display", read_only=True
@@ -66,7 +77,9 @@ class CompanyUpdateSerializer(serializers.ModelSerializer):
         ]
 
 
-class CompanyManagerSerializer(serializers.ModelSerializer):
+class CompanyManagerSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
+    select_related = ("manager", "company")
+
     manager_email = serializers.EmailField(source="manager.email", read_only=True)
     company_name = serializers.CharField(source="company.name", read_only=True)
 
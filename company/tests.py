@@ -2,6 +2,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from .models import CompanyManager
+from job_board.response_cache import COMPANY_DETAIL, response_cache_stats
 from .factories import (
     UserFactory,
     CompanyFactory,
@@ -85,7 +86,7 @@ class CompanyManagerAPITests(APITestCase):
         url = reverse("company-managers-list-create", args=[self.company.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data["results"]), 1)
 
     def test_filter_managers_by_company(self):
         """Test filtering managers by company"""
@@ -96,8 +97,8 @@ class CompanyManagerAPITests(APITestCase):
         url = reverse("company-managers-list-create", args=[self.company.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.manager.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.manager.id)
 
     def test_create_manager(self):
         """Test creating a new company manager"""
@@ -129,3 +130,91 @@ class CompanyManagerAPITests(APITestCase):
         )
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CompanyQueryBudgetTests(APITestCase):
+    """The number of queries per request must not grow with related rows."""
+
+    def setUp(self):
+        self.company = CompanyFactory()
+
+    def test_company_detail_query_budget(self):
+        url = reverse("company-retrieve-update", args=[self.company.id])
+        for count in (1, 5):
+            with self.captureOnCommitCallbacks(execute=True):
+                CompanyOfficeFactory.create_batch(count, company=self.company)
+            # validators, company, offices
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_company_managers_list_query_budget(self):
+        url = reverse("company-managers-list-create", args=[self.company.id])
+        self.client.force_authenticate(user=UserFactory())
+        for count in (1, 5):
+            CompanyManagerFactory.create_batch(count, company=self.company)
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CompanyDetailCacheTests(APITestCase):
+    def setUp(self):
+        # drops entries of an earlier run cached under the same id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = CompanyFactory()
+        self.manager = CompanyManagerFactory(company=self.company).manager
+        self.url = reverse("company-retrieve-update", args=[self.company.id])
+
+    def get(self, expected_cache):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], expected_cache)
+        return response.data
+
+    def test_repeated_requests_are_served_from_cache(self):
+        before = response_cache_stats(COMPANY_DETAIL)
+        self.get("MISS")
+        # only the ETag / Last-Modified validators hit the database
+        with self.assertNumQueries(1):
+            self.get("HIT")
+        self.assertEqual(
+            response_cache_stats(COMPANY_DETAIL)["hits"], before["hits"] + 1
+        )
+
+    def test_update_invalidates_cache(self):
+        self.get("MISS")
+        self.client.force_authenticate(user=self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {"name": "Renamed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get("MISS")["name"], "Renamed")
+
+    def test_office_change_invalidates_cache(self):
+        self.get("MISS")
+        with self.captureOnCommitCallbacks(execute=True):
+            office = CompanyOfficeFactory(company=self.company)
+        self.assertEqual(len(self.get("MISS")["offices"]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            office.delete()
+        self.assertEqual(self.get("MISS")["offices"], [])
+
+
+class CompanyConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.company = CompanyFactory()
+        self.url = reverse("company-retrieve-update", args=[self.company.id])
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_office_deletion_changes_etag(self):
+        office = CompanyOfficeFactory(company=self.company)
+        etag = self.client.get(self.url)["ETag"]
+        office.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
@@ -9,20 +9,57 @@ from .serializers import (
     BookmarkSerializersList,
     BookmarkDestroySerializers,
     JobSerializer,
+    JobListSerializer,
+    JobSearchFilterSerializer,
+    JobRecommendationQuerySerializer,
     JobCreateSerializer,
     JobApplicationSerializer,
     JobApplicationListSerializer,
     JobApplicationUpdateSerializer,
+    JobApplicationBulkStatusSerializer,
+    JobApplicationFilterSerializer,
+    JobApplicationExportSerializer,
+    HiringFunnelQuerySerializer,
     JobUpdateSerializer,
     ListJobApplicationsSerializer,
 )
 from rest_framework import permissions, status, generics
 from rest_framework.response import Response
-from .models import JobBookmark, Job, JobApplication
+from .models import (
+    JobBookmark,
+    Job,
+    JobApplication,
+    HiringFunnel,
+    JobRequirement,
+    JobResponsibility,
+)
 from .permissions import IsObjectOwner, IsCompanyManager, IsCompanyManagerStrict
-from rest_framework.exceptions import PermissionDenied
-from company.models import CompanyManager, CompanyOffice
+from .pagination import ApplicantsPagination, RankedJobPagination
+from .search import filter_applications, filter_jobs, rank_jobs
+from .facets import get_job_facets
+from .recommend import recommend_jobs
+from .exports import EXPORT_FORMATS, export_rows
+from .funnel import FUNNEL_COLUMNS, funnel_report, rollups_between
+from job_board.conditional import ConditionalRetrieveMixin, related_state
+from job_board.prefetch import PrefetchPlanViewMixin
+from job_board.pagination import KeysetPagination
+from job_board.response_cache import JOB_DETAIL, CachedRetrieveMixin
+from rest_framework.exceptions import NotFound, PermissionDenied
+from company.models import Company, CompanyManager, CompanyOffice
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from users.models import Resume
 
 
 class BookmarkCreateAPIView(CreateAPIView):
@@ -36,7 +73,7 @@ class BookmarkDestroyAPIView(DestroyAPIView):
     queryset = JobBookmark.objects.all()
 
 
-class BookmarkListAPIView(ListAPIView):
+class BookmarkListAPIView(PrefetchPlanViewMixin, ListAPIView):
     serializer_class = BookmarkSerializersList
     queryset = JobBookmark.objects.all()
 
@@ -44,8 +81,109 @@ class BookmarkListAPIView(ListAPIView):
         return JobBookmark.objects.filter(user=self.request.user)
 
 
-class JobDetailUpdateAPIView(generics.RetrieveUpdateAPIView):
+class JobSearchAPIView(PrefetchPlanViewMixin, ListAPIView):
+    serializer_class = JobListSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @property
+    def pagination_class(self):
+        filters = self.get_filters()
+        if filters.get("origin") or filters.get("q"):
+            return RankedJobPagination
+        # newest first, seeking on the (-created_at, -id) index
+        return KeysetPagination
+
+    def get_filters(self):
+        if not hasattr(self, "_filters"):
+            serializer = JobSearchFilterSerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._filters = serializer.validated_data
+        return self._filters
+
+    def get_queryset(self):
+        filters = self.get_filters()
+        queryset = filter_jobs(Job.objects.all(), filters)
+        if filters.get("origin"):
+            return queryset.annotate(distance_km=F("distance")).order_by(
+                "distance", "id"
+            )
+        if filters.get("q"):
+            return rank_jobs(queryset, filters["q"])
+        return queryset.order_by("-created_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data["facets"] = get_job_facets(self.get_filters())
+        return response
+
+
+class RecommendedJobsAPIView(PrefetchPlanViewMixin, ListAPIView):
+    """
+    Jobs ranked by BM25 similarity to the user's latest analyzed resume,
+    leaving out jobs they already applied to.
+    """
+
+    serializer_class = JobListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        query = JobRecommendationQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        resume = (
+            Resume.objects.filter(user=self.request.user, content__gt="")
+            .only("content")
+            .first()
+        )
+        if resume is None:
+            raise NotFound("Upload a resume to get job recommendations.")
+
+        applied = list(
+            JobApplication.objects.filter(user=self.request.user).values_list(
+                "job_id", flat=True
+            )
+        )
+        scores = recommend_jobs(
+            resume.content, limit=query.validated_data["limit"], exclude=applied
+        )
+        if not scores:
+            return Job.objects.none()
+        return (
+            Job.objects.filter(pk__in=[pk for pk, _ in scores])
+            .annotate(
+                rank=Case(
+                    *(When(pk=pk, then=Value(score)) for pk, score in scores),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-rank", "-id")
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data = {"results": response.data}
+        return response
+
+
+class JobDetailUpdateAPIView(
+    ConditionalRetrieveMixin,
+    CachedRetrieveMixin,
+    PrefetchPlanViewMixin,
+    generics.RetrieveUpdateAPIView,
+):
     queryset = Job.objects.all()
+    cache_prefix = JOB_DETAIL
+    conditional_fields = (
+        "updated_at",
+        "number_of_applicants",
+        "company__updated_at",
+        "company_office__updated_at",
+    )
+    conditional_annotations = {
+        **related_state("requirements", JobRequirement, "job"),
+        **related_state("responsibilities", JobResponsibility, "job"),
+        **related_state("offices", CompanyOffice, "company", outer_ref="company"),
+    }
 
     def get_serializer_class(self):
         if self.request.method in ["PUT", "PATCH"]:
@@ -116,31 +254,125 @@ class JobCreateAPIView(CreateAPIView):
 
 
 class JobApplicationAPIView(CreateAPIView):
+    """
+    Apply with a single INSERT (see `JobApplicationQuerySet.apply`); the
+    database is only asked why when nothing was inserted. Retries carrying
+    the same `Idempotency-Key` header replay the original 201 response.
+    """
+
     serializer_class = JobApplicationSerializer
     queryset = JobApplication.objects.all()
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = request.headers.get("Idempotency-Key") or None
+        if key is not None and len(key) > 255:
+            return Response(
+                {"detail": "Idempotency-Key must be at most 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = serializer.validated_data
+        application = JobApplication.objects.apply(
+            user=request.user,
+            job_id=data["job"],
+            resume_id=data["resume"],
+            cover_letter=data["cover_letter"],
+            idempotency_key=key,
+        )
+        if application is not None:
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.explain_conflict(request.user, data, key)
+
+    def explain_conflict(self, user, data, key):
+        lookup = Q(job_id=data["job"])
+        if key is not None:
+            lookup |= Q(idempotency_key=key)
+        existing = (
+            JobApplication.objects.filter(lookup, user=user)
+            .values("job_id", "resume_id", "cover_letter", "idempotency_key")
+            .first()
+        )
+        if existing is not None and key is not None:
+            if existing["idempotency_key"] == key:
+                if existing["job_id"] != data["job"]:
+                    return Response(
+                        {"detail": "Idempotency-Key was used for another job."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                replayed = {
+                    "job": existing["job_id"],
+                    "resume": existing["resume_id"],
+                    "cover_letter": existing["cover_letter"],
+                }
+                return Response(
+                    self.get_serializer(replayed).data,
+                    status=status.HTTP_201_CREATED,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+        if existing is not None and existing["job_id"] == data["job"]:
+            errors = {"non_field_errors": ["You've already applied to this job."]}
+        elif not Job.objects.filter(pk=data["job"]).exists():
+            errors = {"job": ["Job Doesn't Exists"]}
+        else:
+            errors = {"non_field_errors": ["Resume does not exist."]}
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
 
 class JobApplicationUpdateAPIView(generics.UpdateAPIView):
+    """
+    Status transitions as one conditional UPDATE that also checks the user
+    manages the job's company; the row is only read again to explain a
+    failure (404, 403, 409 on a concurrent change, 400 on a forbidden move).
+    """
+
     serializer_class = JobApplicationUpdateSerializer
     queryset = JobApplication.objects.all()
-    permission_classes = [permissions.IsAuthenticated, IsCompanyManager]
+    permission_classes = [permissions.IsAuthenticated]
 
     def update(self, request, *args, **kwargs):
-        try:
-            return super().update(request, *args, **kwargs)
-        except DjangoValidationError as e:
-            if hasattr(e, "message_dict"):
-                error_detail = e.message_dict
-            else:
-                error_detail = {
-                    "error": (
-                        [str(m) for m in e.messages]
-                        if hasattr(e, "messages")
-                        else [str(e)]
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data["status"]
+        expected_status = serializer.validated_data.get("expected_status")
+
+        applications = JobApplication.objects.filter(
+            pk=kwargs["pk"], job__company__managers__manager=request.user
+        )
+        if expected_status:
+            applications = applications.filter(status=expected_status)
+        if applications.transition(new_status):
+            return Response(serializer.data)
+
+        current = (
+            JobApplication.objects.filter(pk=kwargs["pk"])
+            .annotate(
+                is_manager=Exists(
+                    CompanyManager.objects.filter(
+                        company=OuterRef("job__company"), manager=request.user
                     )
-                }
+                )
+            )
+            .values("status", "is_manager")
+            .first()
+        )
+        if current is None:
+            raise NotFound()
+        if not current["is_manager"]:
+            raise PermissionDenied(IsCompanyManager.message)
 
-            return Response(error_detail, status=status.HTTP_400_BAD_REQUEST)
+        old_label = JobApplication.JobApplicationStatus(current["status"]).label
+        if expected_status and current["status"] != expected_status:
+            return Response(
+                {"status": [f"The application is {old_label} now."]},
+                status=status.HTTP_409_CONFLICT,
+            )
+        new_label = JobApplication.JobApplicationStatus(new_status).label
+        return Response(
+            {"status": [f"Cannot change status from {old_label} to {new_label}"]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
 
 class JobApplicationListAPIView(ListAPIView):
@@ -152,13 +384,126 @@ class JobApplicationListAPIView(ListAPIView):
         return JobApplication.objects.filter(user=self.request.user)
 
 
-class ListJobApplicationsAPIView(ListAPIView):
+class ListJobApplicationsAPIView(PrefetchPlanViewMixin, ListAPIView):
     serializer_class = ListJobApplicationsSerializer
     permission_classes = [permissions.IsAuthenticated, IsCompanyManagerStrict]
+    pagination_class = ApplicantsPagination
 
     def get_queryset(self):
-        job = get_object_or_404(Job, id=self.kwargs["pk"])
+        job = get_object_or_404(
+            Job.objects.select_related("company"), id=self.kwargs["pk"]
+        )
         self.check_object_permissions(self.request, job)
-        return JobApplication.objects.filter(job=job).order_by(
-            "is_cover_letter_ai_generated"
+        return filter_applications(
+            JobApplication.objects.filter(job=job), self.get_filters()
+        )
+
+    def get_filters(self):
+        serializer = JobApplicationFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+
+class JobApplicationExportAPIView(generics.GenericAPIView):
+    """
+    Stream every application of a job (optionally filtered like the
+    applicants list) as CSV or NDJSON, starting before all rows are read.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsCompanyManagerStrict]
+    queryset = Job.objects.select_related("company")
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        serializer = JobApplicationExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+        content_type, stream = EXPORT_FORMATS[filters["type"]]
+
+        applications = filter_applications(
+            JobApplication.objects.filter(job=job), filters
+        )
+        response = StreamingHttpResponse(
+            stream(export_rows(applications, request)), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="job-{job.pk}-applications.{filters["type"]}"'
+        )
+        return response
+
+
+class JobApplicationBulkStatusAPIView(generics.GenericAPIView):
+    """
+    Move many applications of a job to one status: the manager is checked
+    once and the allowed applications move in one set-based update, which
+    also adjusts the hiring funnel rollups.
+    """
+
+    serializer_class = JobApplicationBulkStatusSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCompanyManagerStrict]
+    queryset = Job.objects.select_related("company")
+
+    def post(self, request, *args, **kwargs):
+        job = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["ids"])
+        new_status = serializer.validated_data["status"]
+
+        moved = JobApplication.objects.filter(job=job, pk__in=ids).bulk_transition(
+            new_status
+        )
+        return Response(
+            {
+                "status": new_status,
+                "updated": sorted(moved),
+                "skipped": sorted(ids.difference(moved)),
+            }
+        )
+
+
+class JobHiringFunnelAPIView(generics.GenericAPIView):
+    """
+    Hiring funnel of a job over time, read from the rollups only.
+    """
+
+    serializer_class = HiringFunnelQuerySerializer
+    permission_classes = [permissions.IsAuthenticated, IsCompanyManagerStrict]
+    queryset = Job.objects.select_related("company")
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            funnel_report(
+                HiringFunnel.objects.filter(job=job), **serializer.validated_data
+            )
+        )
+
+
+class CompanyHiringFunnelAPIView(generics.GenericAPIView):
+    """
+    Hiring funnel of all the jobs of a company over time, with the totals
+    of each job, read from the rollups only.
+    """
+
+    serializer_class = HiringFunnelQuerySerializer
+    permission_classes = [permissions.IsAuthenticated, IsCompanyManagerStrict]
+    queryset = Company.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        company = self.get_object()
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        rollups = HiringFunnel.objects.filter(company=company)
+        report = funnel_report(rollups, **filters)
+        report["jobs"] = list(
+            rollups_between(rollups, filters.get("since"), filters.get("until"))
+            .values("job")
+            .annotate(**{column: Sum(column) for column in FUNNEL_COLUMNS.values()})
+            .order_by("job")
         )
+        return Response(report)
@@ -0,0 +1,56 @@
+from itertools import islice
+
+# JobCard field -> lookup on Job it is copied from
+CARD_FIELDS = {
+    "title": "title",
+    "company_name": "company__name",
+    "city_name": "company_office__city__name",
+    "country_name": "company_office__country__name",
+    "job_type": "job_type",
+    "work_place": "work_place",
+    "salary_start_from": "salary_start_from",
+    "salary_end": "salary_end",
+    "created_at": "created_at",
+}
+
+# Job fields the card depends on, as they can be named in `update_fields`:
+# the first step of each lookup, and the column of the foreign keys
+CARD_SOURCE_FIELDS = frozenset(
+    name
+    for lookup in CARD_FIELDS.values()
+    for name in (
+        (lookup.split("__")[0], lookup.split("__")[0] + "_id")
+        if "__" in lookup
+        else (lookup,)
+    )
+)
+
+REFRESH_BATCH_SIZE = 2000
+
+
+def refresh_job_cards(jobs, batch_size=REFRESH_BATCH_SIZE):
+    """
+    Upsert the cards of every job in the `jobs` queryset: one joined SELECT
+    streamed in batches, each written with a single INSERT ... ON CONFLICT.
+    Returns the number of cards written.
+    """
+    from .models import JobCard
+
+    rows = (
+        jobs.order_by()
+        .values_list("pk", *CARD_FIELDS.values())
+        .iterator(chunk_size=batch_size)
+    )
+    written = 0
+    while batch := list(islice(rows, batch_size)):
+        JobCard.objects.bulk_create(
+            [
+                JobCard(job_id=pk, **dict(zip(CARD_FIELDS, values)))
+                for pk, *values in batch
+            ],
+            update_conflicts=True,
+            unique_fields=["job"],
+            update_fields=list(CARD_FIELDS),
+        )
+        written += len(batch)
+    return written
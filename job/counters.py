@@ -0,0 +1,117 @@
+import uuid
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from job_board.response_cache import JOB_DETAIL, invalidate_detail
+
+# hash of job id -> applications created since the last flush
+PENDING_APPLICANTS_KEY = "job-applicants:pending"
+
+
+def record_application(job_id):
+    """
+    Count a new application of `job_id` once its transaction commits; the
+    total reaches `Job.number_of_applicants` on the next flush. If Redis is
+    down the error is logged and the increment lost, never failing the
+    request or the callbacks after it; `reconcile_applicant_counts` repairs
+    the count.
+    """
+    transaction.on_commit(
+        lambda: get_redis_connection("default").hincrby(
+            PENDING_APPLICANTS_KEY, job_id, 1
+        ),
+        robust=True,
+    )
+
+
+def pending_applicant_counts():
+    pending = get_redis_connection("default").hgetall(PENDING_APPLICANTS_KEY)
+    return {int(job_id): int(count) for job_id, count in pending.items()}
+
+
+def _take_pending():
+    """
+    Atomically move the pending counts aside, so increments arriving during
+    the flush start a fresh hash instead of being lost or applied twice.
+    """
+    redis = get_redis_connection("default")
+    batch_key = f"{PENDING_APPLICANTS_KEY}:{uuid.uuid4().hex}"
+    try:
+        redis.rename(PENDING_APPLICANTS_KEY, batch_key)
+    except ResponseError:  # nothing pending
+        return redis, batch_key, {}
+    pending = redis.hgetall(batch_key)
+    return (
+        redis,
+        batch_key,
+        {int(job_id): int(count) for job_id, count in pending.items()},
+    )
+
+
+def flush_applicant_counts():
+    """
+    Apply the pending counts with one `F()` UPDATE per distinct increment,
+    so a busy minute costs a handful of statements instead of one
+    read-modify-write per application. Returns the number of jobs updated.
+    """
+    from .models import Job
+
+    redis, batch_key, pending = _take_pending()
+    if not pending:
+        return 0
+
+    by_increment = defaultdict(list)
+    for job_id, count in pending.items():
+        by_increment[count].append(job_id)
+    try:
+        with transaction.atomic():
+            for count, job_ids in by_increment.items():
+                Job.objects.filter(pk__in=job_ids).update(
+                    number_of_applicants=F("number_of_applicants") + count
+                )
+    except Exception:
+        # hand the batch back to the next flush
+        for job_id, count in pending.items():
+            redis.hincrby(PENDING_APPLICANTS_KEY, job_id, count)
+        raise
+    finally:
+        redis.delete(batch_key)
+    invalidate_detail(JOB_DETAIL, *pending)
+    return len(pending)
+
+
+def reconcile_applicant_counts():
+    """
+    Recompute `Job.number_of_applicants` from the applications, fixing only
+    the jobs that drifted. Pending counts are discarded first, as the
+    recomputation already includes them. Returns the number of jobs fixed.
+    """
+    from .models import Job, JobApplication
+
+    redis, batch_key, _ = _take_pending()
+    redis.delete(batch_key)
+
+    applications = Coalesce(
+        Subquery(
+            JobApplication.objects.filter(job=OuterRef("pk"))
+            .order_by()
+            .values("job")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        Value(0),
+    )
+    drifted = list(
+        Job.objects.alias(applications=applications)
+        .exclude(number_of_applicants=F("applications"))
+        .values_list("pk", flat=True)
+    )
+    if drifted:
+        Job.objects.filter(pk__in=drifted).update(number_of_applicants=applications)
+        invalidate_detail(JOB_DETAIL, *drifted)
+    return len(drifted)
@@ -0,0 +1,320 @@
+import asyncio
+import hashlib
+import re
+import unicodedata
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .services import AsyncZeroGPTClient, get_zerogpt_client
+from .stylometry import local_report, local_scores, needs_remote
+
+# reports are also kept in the database, so the cache only needs the hot ones
+REPORT_CACHE_TIMEOUT = 60 * 60 * 24
+WHITESPACE_RE = re.compile(r"\s+")
+
+# letters of this many words or fewer are not worth checking
+MIN_WORDS = 30
+SCORE_BATCH_SIZE = 200
+# new applications are scored together, at most this many seconds later
+SCORE_DELAY = 5
+# seconds a drain may hold the letters it claimed before others retry them
+SCORE_LEASE = 60 * 10
+SCORE_TASK = "job.tasks.score_pending_applications_task"
+# hash of running drain totals per database, see `record_drain`
+DRAIN_STATS_KEY = "ai-detection:drains"
+# applications waiting for a report, matching `MIN_WORDS` in SQL
+PENDING_DETECTION = Q(
+    is_cover_letter_ai_report__isnull=True,
+    cover_letter__regex=rf"(\S+\s+){{{MIN_WORDS}}}\S",
+)
+
+
+def normalize_text(text):
+    """
+    Canonical form of a text for deduplication: Unicode compatibility
+    normalization and collapsed whitespace, so letters pasted from different
+    editors hash the same.
+    """
+    return WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def text_digest(text):
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+
+def _cache_key(digest):
+    return f"ai-detection:{digest}"
+
+
+def report_score(report):
+    """
+    Percentage of the text found AI generated, None for a failed report.
+    """
+    if not report or not report.get("success"):
+        return None
+    return report["data"]["fakePercentage"]
+
+
+def cached_reports(digests, using="default"):
+    """
+    Stored reports of the given digests, from Redis first and the table for
+    the rest (which are put back in Redis). Returns {digest: report}.
+    """
+    from .models import AIDetectionResult
+
+    digests = set(digests)
+    if not digests:
+        return {}
+    found = {
+        key.removeprefix(_cache_key("")): report
+        for key, report in cache.get_many(map(_cache_key, digests)).items()
+    }
+    missing = digests - found.keys()
+    if missing:
+        stored = dict(
+            AIDetectionResult.objects.using(using)
+            .filter(digest__in=missing)
+            .values_list("digest", "report")
+        )
+        cache.set_many(
+            {_cache_key(digest): report for digest, report in stored.items()},
+            REPORT_CACHE_TIMEOUT,
+        )
+        found.update(stored)
+    return found
+
+
+def store_reports(reports, using="default"):
+    """
+    Keep successful `{digest: report}` reports for later lookups; failed
+    ones are left out so the text is checked again next time.
+    """
+    from .models import AIDetectionResult
+
+    reports = {
+        digest: report
+        for digest, report in reports.items()
+        if report_score(report) is not None
+    }
+    if not reports:
+        return
+    AIDetectionResult.objects.using(using).bulk_create(
+        [
+            AIDetectionResult(digest=digest, report=report, score=report_score(report))
+            for digest, report in reports.items()
+        ],
+        ignore_conflicts=True,
+    )
+    cache.set_many(
+        {_cache_key(digest): report for digest, report in reports.items()},
+        REPORT_CACHE_TIMEOUT,
+    )
+
+
+def forget_reports(digests, using="default"):
+    from .models import AIDetectionResult
+
+    AIDetectionResult.objects.using(using).filter(digest__in=digests).delete()
+    cache.delete_many([_cache_key(digest) for digest in digests])
+
+
+def detect_ai_report(text, client=None):
+    """
+    ZeroGPT report of `text`, reusing the stored report of any text with
+    the same normalized content instead of calling the API again.
+    """
+    digest = text_digest(text)
+    report = cached_reports([digest]).get(digest)
+    if report is None:
+        report = (client or get_zerogpt_client()).detect(text)
+        store_reports({digest: report})
+    return report
+
+
+def is_worth_checking(text):
+    return len(text.split()) > MIN_WORDS
+
+
+def preliminary_detection(texts):
+    """
+    `(score, report)` of each text from the local stylometric pre-filter;
+    the report is None unless the text is clearly human, and the text still
+    needs ZeroGPT.
+    """
+    scores = local_scores(texts)
+    return [
+        (float(score), None if remote else local_report(float(score)))
+        for score, remote in zip(scores, needs_remote(scores))
+    ]
+
+
+def score_applications(applications, client=None, using="default"):
+    """
+    Fill the AI detection report and score of `applications` in place:
+    stored reports are reused, the local pre-filter settles the clearly
+    human letters and each remaining distinct text is sent once, concurrently.
+    Letters that could not be sent keep their preliminary score. Returns
+    the applications changed.
+    """
+    digests = {
+        application.pk: text_digest(application.cover_letter)
+        for application in applications
+    }
+    stored = cached_reports(digests.values(), using)
+    unchecked = [
+        application
+        for application in applications
+        if digests[application.pk] not in stored
+    ]
+    reports = {}
+    texts = {}
+    preliminary = preliminary_detection(
+        [application.cover_letter for application in unchecked]
+    )
+    for application, (score, report) in zip(unchecked, preliminary):
+        application.is_cover_letter_ai_generated = score
+        if report is None:
+            texts[digests[application.pk]] = application.cover_letter
+        else:
+            reports[application.pk] = report
+    if texts:
+        fetched = asyncio.run(_detect_many(texts, client))
+        store_reports(fetched, using)
+        stored.update(fetched)
+
+    now = timezone.now()
+    for application in applications:
+        report = reports.get(application.pk) or stored.get(digests[application.pk])
+        if report is not None:
+            application.is_cover_letter_ai_report = report
+            application.is_cover_letter_ai_generated = report_score(report)
+        application.updated_at = now
+    return applications
+
+
+async def _detect_many(texts, client=None):
+    async with client or AsyncZeroGPTClient() as client:
+        return await client.detect_many(texts)
+
+
+def claim_pending_applications(pending, batch_size):
+    """
+    Lease a batch of `pending` applications to this drain for `SCORE_LEASE`
+    seconds: rows locked by another drain are skipped, and the lock only
+    lasts until the lease is written, so other updates of the applications
+    never wait on ZeroGPT. Returns the claimed applications.
+    """
+    from .models import JobApplication
+
+    applications = JobApplication.objects.using(pending.db)
+    now = timezone.now()
+    with transaction.atomic(using=pending.db):
+        ids = list(
+            pending.filter(
+                Q(ai_detection_claimed_until__isnull=True)
+                | Q(ai_detection_claimed_until__lt=now)
+            )
+            .select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        applications.filter(pk__in=ids).update(
+            ai_detection_claimed_until=now + timedelta(seconds=SCORE_LEASE)
+        )
+    return list(
+        applications.filter(pk__in=ids)
+        .only(
+            "pk",
+            "cover_letter",
+            "is_cover_letter_ai_report",
+            "is_cover_letter_ai_generated",
+        )
+        .order_by("pk")
+    )
+
+
+def score_pending_applications(
+    batch_size=SCORE_BATCH_SIZE, client=None, applications=None, using="default"
+):
+    """
+    Drain the applications waiting for a report (among `applications`, all
+    of database `using` by default), one claimed batch at a time. ZeroGPT is called with no
+    transaction open, and each batch is written back with a single
+    `bulk_update` that leaves alone letters scored meanwhile and releases
+    the claim. Draining stops at the first batch where nothing could be
+    scored. Returns the number of applications scored.
+    """
+    from .models import JobApplication
+
+    pending = (
+        JobApplication.objects.using(using) if applications is None else applications
+    ).filter(PENDING_DETECTION)
+    total = 0
+    while True:
+        batch = claim_pending_applications(pending, batch_size)
+        for application in score_applications(batch, client, pending.db):
+            application.ai_detection_claimed_until = None
+        JobApplication.objects.using(pending.db).filter(
+            is_cover_letter_ai_report__isnull=True
+        ).bulk_update(
+            batch,
+            [
+                "is_cover_letter_ai_report",
+                "is_cover_letter_ai_generated",
+                "ai_detection_claimed_until",
+                "updated_at",
+            ],
+        )
+        scored = sum(
+            application.is_cover_letter_ai_report is not None for application in batch
+        )
+        total += scored
+        if len(batch) < batch_size or not scored:
+            return total
+
+
+def schedule_pending_scoring(using="default", countdown=SCORE_DELAY):
+    """
+    Queue a drain of database `using` `countdown` seconds from now through
+    its outbox; the relay publishes the drains queued by applications made
+    meanwhile as one.
+    """
+    from .outbox import enqueue
+
+    # the default database is drained without arguments, like the calls
+    # `JobApplicationQuerySet.apply()` records in SQL, so they are sent once
+    kwargs = {} if using == DEFAULT_DB_ALIAS else {"using": using}
+    enqueue(SCORE_TASK, kwargs=kwargs, countdown=countdown, using=using)
+
+
+def record_drain(using, seconds, scored):
+    """
+    Add a drain's wall time and scored letters to the running totals of
+    database `using`, which `benchmark_ai_detection` reads to time the
+    workers.
+    """
+    key = f"{DRAIN_STATS_KEY}:{using}"
+    redis = get_redis_connection("default")
+    with redis.pipeline() as pipe:
+        pipe.hincrbyfloat(key, "seconds", seconds)
+        pipe.hincrby(key, "drains", 1)
+        pipe.hincrby(key, "scored", scored)
+        pipe.execute()
+
+
+def drain_stats(using):
+    stats = get_redis_connection("default").hgetall(f"{DRAIN_STATS_KEY}:{using}")
+    return {
+        "seconds": float(stats.get(b"seconds", 0)),
+        "drains": int(stats.get(b"drains", 0)),
+        "scored": int(stats.get(b"scored", 0)),
+    }
+
+
+def reset_drain_stats(using):
+    get_redis_connection("default").delete(f"{DRAIN_STATS_KEY}:{using}")
@@ -0,0 +1,102 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    "id",
+    "applied_at",
+    "updated_at",
+    "status",
+    "first_name",
+    "last_name",
+    "email",
+    "resume",
+    "ai_score",
+    "cover_letter",
+]
+
+# cells starting with these are formulas to Excel and Google Sheets
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# fields read from the export queryset, user and resume included
+EXPORT_FIELDS = [
+    "id",
+    "created_at",
+    "updated_at",
+    "status",
+    "is_cover_letter_ai_generated",
+    "cover_letter",
+    "user__first_name",
+    "user__last_name",
+    "user__email",
+    "resume__resume",
+]
+
+
+def export_rows(applications, request):
+    """
+    Yield one dict per application, reading the queryset through a
+    server-side cursor so memory stays flat however many rows there are.
+    """
+    applications = (
+        applications.select_related("user", "resume")
+        .only(*EXPORT_FIELDS)
+        .order_by("id")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for application in applications:
+        yield {
+            "id": application.id,
+            "applied_at": application.created_at,
+            "updated_at": application.updated_at,
+            "status": application.get_status_display(),
+            "first_name": application.user.first_name,
+            "last_name": application.user.last_name,
+            "email": application.user.email,
+            "resume": request.build_absolute_uri(application.resume.resume.url),
+            "ai_score": application.is_cover_letter_ai_generated,
+            "cover_letter": application.cover_letter,
+        }
+
+
+class _Echo:
+    """
+    File-like object handing back what `csv.writer` writes, so each row can
+    be yielded as soon as it is formatted.
+    """
+
+    def write(self, value):
+        return value
+
+
+def escape_formula(value):
+    """
+    Neutralize a text cell spreadsheets would run as a formula (CSV
+    injection) by prefixing it with a quote.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_COLUMNS)
+    yield writer.writerow(dict(zip(EXPORT_COLUMNS, EXPORT_COLUMNS)))
+    for row in rows:
+        yield writer.writerow(
+            {column: escape_formula(value) for column, value in row.items()}
+        )
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", stream_csv),
+    "ndjson": ("application/x-ndjson", stream_ndjson),
+}
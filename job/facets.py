@@ -0,0 +1,102 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .search import SALARY_BANDS, filter_jobs, salary_band_q
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+FACETS_VERSION_KEY = "job-facets:version"
+
+
+def _facets_cache_key(filters):
+    normalized = {key: value for key, value in filters.items() if value}
+    if "q" in normalized:
+        normalized["q"] = " ".join(normalized["q"].lower().split())
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    version = cache.get_or_set(FACETS_VERSION_KEY, 1, timeout=None)
+    return f"job-facets:{version}:{digest}"
+
+
+def invalidate_job_facets():
+    """
+    Bump the facets version so every cached result is ignored from now on;
+    stale entries simply expire.
+    """
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        cache.set(FACETS_VERSION_KEY, 1, timeout=None)
+
+
+def compute_job_facets(filters):
+    """
+    Count jobs per job type, work place, salary band and country for the
+    given filters in a single query: rows are grouped by country and every
+    other bucket is a conditional COUNT summed across those rows.
+    """
+    from .models import Job
+
+    buckets = {
+        "job_type": {value: Q(job_type=value) for value in Job.JobType.values},
+        "work_place": {value: Q(work_place=value) for value in Job.WorkPlace.values},
+        "salary_band": {band: salary_band_q(band) for band in SALARY_BANDS},
+    }
+    aggregates = {
+        f"{facet}__{value}": Count("id", filter=condition)
+        for facet, conditions in buckets.items()
+        for value, condition in conditions.items()
+    }
+    rows = (
+        filter_jobs(Job.objects.all(), filters)
+        .order_by()
+        .values("company_office__country", "company_office__country__name")
+        .annotate(total=Count("id"), **aggregates)
+    )
+
+    labels = {
+        "job_type": dict(Job.JobType.choices),
+        "work_place": dict(Job.WorkPlace.choices),
+        "salary_band": {band: band for band in SALARY_BANDS},
+    }
+    counts = {key: 0 for key in aggregates}
+    countries = []
+    total = 0
+    for row in rows:
+        total += row["total"]
+        for key in aggregates:
+            counts[key] += row[key]
+        if row["company_office__country"] is not None:
+            countries.append(
+                {
+                    "value": row["company_office__country"],
+                    "label": row["company_office__country__name"],
+                    "count": row["total"],
+                }
+            )
+
+    facets = {"total": total}
+    for facet, conditions in buckets.items():
+        facets[facet] = [
+            {
+                "value": value,
+                "label": labels[facet][value],
+                "count": counts[f"{facet}__{value}"],
+            }
+            for value in conditions
+        ]
+    facets["country"] = sorted(countries, key=lambda c: (-c["count"], c["label"]))
+    return facets
+
+
+def get_job_facets(filters):
+    """
+    Cached `compute_job_facets`, keyed by the normalized filter set.
+    """
+    key = _facets_cache_key(filters)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_job_facets(filters)
+        cache.set(key, facets, timeout=FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,132 @@
+from django.db import connections, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+# application status -> rollup column counting applications in it
+FUNNEL_COLUMNS = {
+    "A": "applied",
+    "I": "invited",
+    "R": "rejected",
+    "H": "hired",
+}
+
+# reporting period -> truncation of the rollup day
+PERIODS = {
+    "day": None,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+
+def funnel_upsert_sql(connection, changes):
+    """
+    SQL adding the `(job_id, created_at, status, delta)` rows of the relation
+    named `changes` to the rollups of the days the applications were made
+    on. Runs on its own or as a data-modifying CTE of the statement changing
+    the applications, and takes the time zone name as its only parameter.
+    """
+    from .models import HiringFunnel, Job
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(FUNNEL_COLUMNS.values())
+    sums = ", ".join(
+        f"SUM(CASE WHEN change.status = '{status}' THEN change.delta ELSE 0 END)"
+        for status in FUNNEL_COLUMNS
+    )
+    updates = ", ".join(
+        f"{column} = funnel.{column} + EXCLUDED.{column}"
+        for column in FUNNEL_COLUMNS.values()
+    )
+    return f"""
+        INSERT INTO {quote(HiringFunnel._meta.db_table)} AS funnel (
+            job_id, company_id, day, {columns}
+        )
+        SELECT job.id, job.company_id,
+            (change.created_at AT TIME ZONE %s)::date, {sums}
+        FROM {changes} change
+        JOIN {quote(Job._meta.db_table)} job ON job.id = change.job_id
+        GROUP BY 1, 2, 3
+        ON CONFLICT (job_id, day) DO UPDATE SET {updates}
+    """
+
+
+def record_funnel_changes(changes, using="default"):
+    """
+    Apply `(job_id, created_at, status, delta)` changes to the rollups in
+    one upsert adding to the stored counts.
+    """
+    if not changes:
+        return
+    connection = connections[using]
+    rows = ", ".join(["(%s::integer, %s::timestamptz, %s, %s::integer)"] * len(changes))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH changes (job_id, created_at, status, delta) AS (VALUES {rows})
+            {funnel_upsert_sql(connection, "changes")}
+            """,
+            [
+                *(value for change in changes for value in change),
+                timezone.get_current_timezone_name(),
+            ],
+        )
+
+
+def rebuild_hiring_funnel(using="default"):
+    """
+    Recompute every rollup row from the applications in one transaction.
+    Returns the number of rows written.
+    """
+    from .models import HiringFunnel, Job, JobApplication
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ", ".join(FUNNEL_COLUMNS.values())
+    counts = ", ".join(
+        f"COUNT(*) FILTER (WHERE application.status = '{status}')"
+        for status in FUNNEL_COLUMNS
+    )
+    funnel_table = quote(HiringFunnel._meta.db_table)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {funnel_table}")
+        cursor.execute(
+            f"""
+            INSERT INTO {funnel_table} (job_id, company_id, day, {columns})
+            SELECT job.id, job.company_id,
+                (application.created_at AT TIME ZONE %s)::date, {counts}
+            FROM {quote(JobApplication._meta.db_table)} application
+            JOIN {quote(Job._meta.db_table)} job ON job.id = application.job_id
+            GROUP BY 1, 2, 3
+            """,
+            [timezone.get_current_timezone_name()],
+        )
+        return cursor.rowcount
+
+
+def rollups_between(rollups, since=None, until=None):
+    if since:
+        rollups = rollups.filter(day__gte=since)
+    if until:
+        rollups = rollups.filter(day__lte=until)
+    return rollups
+
+
+def funnel_report(rollups, period="day", since=None, until=None):
+    """
+    Funnel totals and their series per `period` from rollup rows only, by
+    the day the applications were made.
+    """
+    rollups = rollups_between(rollups, since, until)
+    truncate = PERIODS[period]
+    sums = {column: Sum(column) for column in FUNNEL_COLUMNS.values()}
+    series = list(
+        rollups.values(period=truncate("day") if truncate else F("day"))
+        .annotate(**sums)
+        .order_by("period")
+    )
+    totals = {
+        column: sum(point[column] for point in series)
+        for column in FUNNEL_COLUMNS.values()
+    }
+    return {"totals": totals, "series": series}
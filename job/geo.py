@@ -0,0 +1,81 @@
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import (
+    ASin,
+    Cast,
+    Cos,
+    Least,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
+)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = 111.045
+
+LATITUDE = "company_office__latitude"
+LONGITUDE = "company_office__longitude"
+
+
+def bounding_box_q(latitude, longitude, radius_km):
+    """
+    Cheap, index-friendly pre-filter: jobs whose office lies inside the
+    latitude/longitude box enclosing the search circle.
+    """
+    latitude_delta = radius_km / KM_PER_DEGREE_LATITUDE
+    min_latitude = latitude - latitude_delta
+    max_latitude = latitude + latitude_delta
+    condition = Q(
+        **{f"{LATITUDE}__range": (max(min_latitude, -90), min(max_latitude, 90))}
+    )
+    if min_latitude <= -90 or max_latitude >= 90:
+        # the circle covers a pole, so every longitude is in range
+        return condition
+
+    longitude_delta = latitude_delta / math.cos(math.radians(latitude))
+    min_longitude = longitude - longitude_delta
+    max_longitude = longitude + longitude_delta
+    if max_longitude - min_longitude >= 360:
+        return condition
+    if min_longitude < -180:
+        condition &= Q(**{f"{LONGITUDE}__gte": min_longitude + 360}) | Q(
+            **{f"{LONGITUDE}__lte": max_longitude}
+        )
+    elif max_longitude > 180:
+        condition &= Q(**{f"{LONGITUDE}__gte": min_longitude}) | Q(
+            **{f"{LONGITUDE}__lte": max_longitude - 360}
+        )
+    else:
+        condition &= Q(**{f"{LONGITUDE}__range": (min_longitude, max_longitude)})
+    return condition
+
+
+def haversine_km(latitude, longitude):
+    """
+    Great-circle distance in km between the job's office and a point.
+    """
+    origin_latitude = Value(math.radians(latitude), output_field=FloatField())
+    origin_longitude = Value(math.radians(longitude), output_field=FloatField())
+    office_latitude = Radians(Cast(F(LATITUDE), FloatField()))
+    office_longitude = Radians(Cast(F(LONGITUDE), FloatField()))
+    a = Power(Sin((office_latitude - origin_latitude) / 2), 2) + Cos(
+        origin_latitude
+    ) * Cos(office_latitude) * Power(Sin((office_longitude - origin_longitude) / 2), 2)
+    return Value(2 * EARTH_RADIUS_KM, output_field=FloatField()) * ASin(
+        Sqrt(Least(a, Value(1.0, output_field=FloatField())))
+    )
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Jobs within `radius_km` of the point, pruned with the bounding box first so
+    the exact distance is only computed for nearby offices. The distance is
+    available to later `annotate`/`order_by` calls as `distance`.
+    """
+    return (
+        queryset.filter(bounding_box_q(latitude, longitude, radius_km))
+        .alias(distance=haversine_km(latitude, longitude))
+        .filter(distance__lte=radius_km)
+    )
@@ -0,0 +1,227 @@
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import numpy as np
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from faker import Faker
+
+from company.models import Company
+from job.detection import (
+    PENDING_DETECTION,
+    SCORE_TASK,
+    drain_stats,
+    forget_reports,
+    reset_drain_stats,
+    schedule_pending_scoring,
+    text_digest,
+)
+from job.models import Job, JobApplication, OutboxMessage
+from job.outbox import relay_outbox
+from users.models import Resume
+
+User = get_user_model()
+
+# seconds between checks of the letters left to score
+POLL_INTERVAL = 0.1
+
+
+class Command(BaseCommand):
+    help = (
+        "queue N synthetic applications for AI detection in the benchmark "
+        "database, let the celery workers score them and report their "
+        "throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="benchmark",
+            help="alias of the pre-created, migrated database to fill",
+        )
+        parser.add_argument("--applications", type=int, default=1000)
+        parser.add_argument(
+            "--drains", type=int, default=2, help="drains queued side by side"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=600, help="seconds to wait for workers"
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="keep the synthetic applications"
+        )
+
+    def handle(self, *args, **kwargs):
+        using = kwargs["database"]
+        if using == DEFAULT_DB_ALIAS or using not in connections:
+            raise CommandError(
+                f"{using!r} is not a benchmark database: add one to DATABASES "
+                "and migrate it with `migrate --database`"
+            )
+        if urlsplit(settings.ZERO_GPT_URL).hostname.endswith("zerogpt.com"):
+            raise CommandError(
+                "ZERO_GPT_URL is the real detector: point it (and the "
+                "workers') at `manage.py zerogpt_stub`"
+            )
+        slots = self.worker_slots()
+        key = uuid.uuid4().hex
+        letters = []
+        try:
+            applications = self.create_applications(using, key, kwargs["applications"])
+            letters += applications.values_list("cover_letter", flat=True)
+            self.run_benchmark(using, applications, slots, kwargs)
+        finally:
+            if kwargs["keep"]:
+                self.stdout.write(f"Kept the applications of Benchmark {key}")
+            else:
+                self.delete_applications(using, key)
+            forget_reports([text_digest(letter) for letter in letters], using)
+
+    def worker_slots(self):
+        """
+        Tasks the running workers can run side by side, as they report it.
+        """
+        stats = current_app.control.inspect(timeout=2).stats()
+        if not stats:
+            raise CommandError("no celery worker answered")
+        return sum(worker["pool"]["max-concurrency"] for worker in stats.values())
+
+    def run_benchmark(self, using, applications, slots, kwargs):
+        reset_drain_stats(using)
+        pending = applications.filter(PENDING_DETECTION)
+        started = time.perf_counter()
+        queued = self.queue_drains(using, kwargs["drains"])
+        while pending.exists():
+            if time.perf_counter() - started > kwargs["timeout"]:
+                raise CommandError(
+                    f"{pending.count()} applications still pending after "
+                    f"{kwargs['timeout']:.0f}s"
+                )
+            time.sleep(POLL_INTERVAL)
+            # the drains a worker re-queued while ZeroGPT was down
+            relay_outbox(using=using)
+            if (
+                drain_stats(using)["drains"] >= queued
+                and not OutboxMessage.objects.using(using)
+                .filter(task=SCORE_TASK)
+                .exists()
+            ):
+                # the drains are done, but left letters behind (and no retry)
+                queued += self.queue_drains(using, 1)
+        elapsed = time.perf_counter() - started
+
+        latencies = np.array(
+            [
+                latency.total_seconds()
+                for latency in applications.filter(
+                    is_cover_letter_ai_report__isnull=False
+                )
+                .annotate(latency=F("updated_at") - F("created_at"))
+                .values_list("latency", flat=True)
+            ]
+        )
+        self.report(kwargs, latencies, elapsed, drain_stats(using), slots)
+
+    def queue_drains(self, using, count):
+        # the relay sends identical calls once, so each drain is relayed alone
+        for _ in range(count):
+            schedule_pending_scoring(using, countdown=0)
+            relay_outbox(using=using)
+        return count
+
+    def create_applications(self, using, key, count):
+        """
+        Add `count` applications pending detection to a new job of company
+        "Benchmark `key`" in database `using`, without the signals (and
+        queued drains) of saving them one by one.
+        """
+        fake = Faker()
+        users = User.objects.using(using).bulk_create(
+            User(email=f"benchmark-{key}-{i}@example.com", password="!")
+            for i in range(count)
+        )
+        company = Company.objects.using(using).bulk_create(
+            [Company(name=f"Benchmark {key}", about="AI detection benchmark")]
+        )[0]
+        job = Job.objects.using(using).bulk_create(
+            [
+                Job(
+                    title="Benchmark",
+                    overview="AI detection benchmark",
+                    salary_start_from=1,
+                    salary_end=1,
+                    company=company,
+                    job_type=Job.JobType.FULL_TIME,
+                    work_place=Job.WorkPlace.REMOTE,
+                    created_by=users[0],
+                )
+            ]
+        )[0]
+        resume = Resume.objects.using(using).bulk_create(
+            [Resume(user=users[0], resume="resumes/benchmark.pdf")]
+        )[0]
+        JobApplication.objects.using(using).bulk_create(
+            JobApplication(
+                job=job,
+                user=user,
+                resume=resume,
+                cover_letter=f"{key} {fake.paragraph(nb_sentences=12)}",
+            )
+            for user in users
+        )
+        return JobApplication.objects.using(using).filter(job=job)
+
+    def delete_applications(self, using, key):
+        """
+        Delete what `create_applications` added in SQL, as the deletion
+        signals would expire the caches of the default database.
+        """
+        connection = connections[using]
+        table = {
+            model: connection.ops.quote_name(model._meta.db_table)
+            for model in (JobApplication, Job, Resume, User, Company, OutboxMessage)
+        }
+        users = f"SELECT id FROM {table[User]} WHERE email LIKE %s"
+        companies = f"SELECT id FROM {table[Company]} WHERE name = %s"
+        jobs = f"SELECT id FROM {table[Job]} WHERE company_id IN ({companies})"
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table[JobApplication]} WHERE job_id IN ({jobs})",
+                [f"Benchmark {key}"],
+            )
+            cursor.execute(
+                f"DELETE FROM {table[Job]} WHERE company_id IN ({companies})",
+                [f"Benchmark {key}"],
+            )
+            cursor.execute(
+                f"DELETE FROM {table[Resume]} WHERE user_id IN ({users})",
+                [f"benchmark-{key}-%"],
+            )
+            cursor.execute(
+                f"DELETE FROM {table[User]} WHERE email LIKE %s", [f"benchmark-{key}-%"]
+            )
+            cursor.execute(
+                f"DELETE FROM {table[Company]} WHERE name = %s", [f"Benchmark {key}"]
+            )
+            cursor.execute(
+                f"DELETE FROM {table[OutboxMessage]} WHERE task = %s", [SCORE_TASK]
+            )
+
+    def report(self, kwargs, latencies, elapsed, stats, slots):
+        scored = len(latencies)
+        self.stdout.write(
+            f"Scored {scored}/{kwargs['applications']} applications "
+            f"in {elapsed:.2f}s with {stats['drains']} drains"
+        )
+        self.stdout.write(f"Throughput: {scored / elapsed:.1f} scored/s")
+        if scored:
+            p50, p99 = np.percentile(latencies, [50, 99])
+            self.stdout.write(f"End-to-end latency: p50 {p50:.3f}s, p99 {p99:.3f}s")
+        # time the workers spent draining over the time their pools had:
+        # low means the drains left slots idle (or queued behind other tasks)
+        utilization = stats["seconds"] / (elapsed * slots) * 100
+        self.stdout.write(f"Worker utilization: {utilization:.1f}% of {slots} slots")
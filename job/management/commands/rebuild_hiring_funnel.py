@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from job.funnel import rebuild_hiring_funnel
+
+
+class Command(BaseCommand):
+    help = "recompute the hiring funnel rollups from the applications"
+
+    def handle(self, *args, **kwargs):
+        written = rebuild_hiring_funnel()
+        self.stdout.write(f"Rebuilt {written} hiring funnel rows")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from company.models import CompanyOffice, copy_city_coordinates
+from job.cards import REFRESH_BATCH_SIZE, refresh_job_cards
+from job.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "rebuild the denormalized job cards from jobs, companies and offices, "
+        "and the office coordinates from their city"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REFRESH_BATCH_SIZE)
+
+    def handle(self, *args, **kwargs):
+        # the radius search reads the coordinates copied to the offices
+        synced = copy_city_coordinates(CompanyOffice.objects.all())
+        self.stdout.write(f"Synced the coordinates of {synced} offices")
+        written = refresh_job_cards(Job.objects.all(), batch_size=kwargs["batch_size"])
+        self.stdout.write(f"Rebuilt {written} job cards")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from job.counters import reconcile_applicant_counts
+
+
+class Command(BaseCommand):
+    help = "recompute the number of applicants of every job from its applications"
+
+    def handle(self, *args, **kwargs):
+        fixed = reconcile_applicant_counts()
+        self.stdout.write(f"Fixed the applicant count of {fixed} jobs")
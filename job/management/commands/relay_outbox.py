@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from job.outbox import OUTBOX_BATCH_SIZE, relay_outbox
+
+
+class Command(BaseCommand):
+    help = "publish the task calls recorded in the outbox to celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="seconds between passes"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="relay the due messages and exit"
+        )
+
+    def handle(self, *args, **kwargs):
+        while True:
+            published = relay_outbox(kwargs["batch_size"])
+            if published or kwargs["once"]:
+                self.stdout.write(f"Published {published} messages")
+            if kwargs["once"]:
+                return
+            time.sleep(kwargs["interval"])
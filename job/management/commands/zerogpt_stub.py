@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from job.zerogpt_stub import ZeroGPTStubServer
+
+
+class Command(BaseCommand):
+    help = "serve a local stand-in for the ZeroGPT detectText endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency", type=float, default=0.2, help="mean reply time in seconds"
+        )
+        parser.add_argument("--jitter", type=float, default=0.05)
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="share of 503 replies"
+        )
+        parser.add_argument(
+            "--rate-limit", type=float, help="requests per second before 429s"
+        )
+
+    def handle(self, *args, **kwargs):
+        server = ZeroGPTStubServer(
+            (kwargs["host"], kwargs["port"]),
+            latency=kwargs["latency"],
+            jitter=kwargs["jitter"],
+            error_rate=kwargs["error_rate"],
+            rate_limit=kwargs["rate_limit"],
+        )
+        self.stdout.write(f"Serving ZeroGPT stand-in on {server.url}")
+        self.stdout.write("Set ZERO_GPT_URL to it to send detection there")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(str(server.stats))
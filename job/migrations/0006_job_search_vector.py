@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+BACKFILL_SEARCH_VECTOR = """
+UPDATE job_job SET search_vector =
+    setweight(to_tsvector('english', coalesce(title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(overview, '')), 'B')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(description, ' ') FROM job_jobrequirement
+        WHERE job_jobrequirement.job_id = job_job.id
+    ), '')), 'C')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(description, ' ') FROM job_jobresponsibility
+        WHERE job_jobresponsibility.job_id = job_job.id
+    ), '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0005_jobapplication_is_cover_letter_ai_report"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="job_search_vector_gin"
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0006_job_search_vector"),
+        ("users", "0004_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="job_app_user_keyset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["job", "is_cover_letter_ai_generated", "id"],
+                name="job_app_applicants_keyset_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobbookmark",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="job_bookmark_user_keyset_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_JOB_CARDS = """
+INSERT INTO job_jobcard (
+    job_id, title, company_name, city_name, country_name, job_type,
+    work_place, salary_start_from, salary_end, created_at
+)
+SELECT job.id, job.title, company.name, city.name, country.name, job.job_type,
+    job.work_place, job.salary_start_from, job.salary_end, job.created_at
+FROM job_job job
+JOIN company_company company ON company.id = job.company_id
+LEFT JOIN company_companyoffice office ON office.id = job.company_office_id
+LEFT JOIN cities_light_city city ON city.id = office.city_id
+LEFT JOIN cities_light_country country ON country.id = office.country_id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cities_light", "0011_alter_city_country_alter_city_region_and_more"),
+        ("job", "0007_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobCard",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="card",
+                        serialize=False,
+                        to="job.job",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("company_name", models.CharField(max_length=255)),
+                ("city_name", models.CharField(blank=True, max_length=200, null=True)),
+                (
+                    "country_name",
+                    models.CharField(blank=True, max_length=200, null=True),
+                ),
+                (
+                    "job_type",
+                    models.CharField(
+                        choices=[("FT", "Full Time"), ("PT", "Part Time")], max_length=2
+                    ),
+                ),
+                (
+                    "work_place",
+                    models.CharField(
+                        choices=[("RE", "Remote"), ("OF", "Office"), ("HY", "Hybrid")],
+                        max_length=6,
+                    ),
+                ),
+                ("salary_start_from", models.PositiveIntegerField()),
+                ("salary_end", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL_JOB_CARDS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:55
+
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# the tokenizer of `job.recommend` as of this migration, frozen so later
+# changes to it do not change what the migration does
+TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]*")
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be but by for from has have in is it its of on or our
+    that the their this to was we were will with you your
+    """.split()
+)
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    return [
+        token
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def job_term_counts(job):
+    counts = Counter(tokenize(job["title"]) * TITLE_WEIGHT)
+    for field in ("overview", "requirements_text", "responsibilities_text"):
+        counts.update(tokenize(job[field]))
+    return counts
+
+
+def backfill_term_vectors(apps, schema_editor):
+    Job = apps.get_model("job", "Job")
+    JobTermVector = apps.get_model("job", "JobTermVector")
+    descriptions = {"requirements_text": {}, "responsibilities_text": {}}
+    for relation, model_name in (
+        ("requirements_text", "JobRequirement"),
+        ("responsibilities_text", "JobResponsibility"),
+    ):
+        rows = apps.get_model("job", model_name).objects.values_list(
+            "job_id", "description"
+        )
+        for job_id, description in rows.iterator():
+            descriptions[relation].setdefault(job_id, []).append(description)
+
+    vectors = []
+    for job in Job.objects.values("pk", "title", "overview").iterator():
+        for relation, texts in descriptions.items():
+            job[relation] = " ".join(texts.get(job["pk"], ()))
+        counts = job_term_counts(job)
+        vectors.append(
+            JobTermVector(
+                job_id=job["pk"], terms=dict(counts), length=sum(counts.values())
+            )
+        )
+    JobTermVector.objects.bulk_create(vectors, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0008_job_card"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobTermVector",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="term_vector",
+                        serialize=False,
+                        to="job.job",
+                    ),
+                ),
+                ("terms", models.JSONField(default=dict)),
+                ("length", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_term_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0009_job_term_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["job", "status", "is_cover_letter_ai_generated", "id"],
+                name="job_app_status_keyset_idx",
+            ),
+        ),
+    ]
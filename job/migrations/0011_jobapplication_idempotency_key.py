@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0010_application_status_keyset_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobapplication",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="jobapplication",
+            constraint=models.UniqueConstraint(
+                fields=("user", "idempotency_key"),
+                name="job_app_user_idempotency_key_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_HIRING_FUNNEL = """
+INSERT INTO job_hiringfunnel (
+    job_id, company_id, day, applied, invited, rejected, hired
+)
+SELECT job.id, job.company_id, (application.created_at AT TIME ZONE 'UTC')::date,
+    COUNT(*) FILTER (WHERE application.status = 'A'),
+    COUNT(*) FILTER (WHERE application.status = 'I'),
+    COUNT(*) FILTER (WHERE application.status = 'R'),
+    COUNT(*) FILTER (WHERE application.status = 'H')
+FROM job_jobapplication application
+JOIN job_job job ON job.id = application.job_id
+GROUP BY 1, 2, 3;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("company", "0006_companyoffice_coordinates"),
+        ("job", "0011_jobapplication_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HiringFunnel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("applied", models.IntegerField(default=0)),
+                ("invited", models.IntegerField(default=0)),
+                ("rejected", models.IntegerField(default=0)),
+                ("hired", models.IntegerField(default=0)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="company.company",
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="funnel",
+                        to="job.job",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["company", "day"], name="job_funnel_company_day_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("job", "day"), name="job_funnel_job_day_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_HIRING_FUNNEL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0012_hiring_funnel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AIDetectionResult",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("report", models.JSONField()),
+                ("score", models.FloatField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0013_ai_detection_result"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                condition=models.Q(
+                    ("cover_letter__regex", "(\\S+\\s+){30}\\S"),
+                    ("is_cover_letter_ai_report__isnull", True),
+                ),
+                fields=["id"],
+                name="job_app_ai_pending_idx",
+            ),
+        ),
+    ]
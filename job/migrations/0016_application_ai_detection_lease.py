@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0015_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobapplication",
+            name="ai_detection_claimed_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("job", "0016_application_ai_detection_lease"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["-created_at", "-id"], name="job_keyset_idx"),
+        ),
+    ]
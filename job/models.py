@@ -1,9 +1,17 @@
+import json
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.conf import settings
-from django.db import models
+from django.db import connections, models, transaction
+from django.utils import timezone
+from company.models import skip_place_refresh
+from job_board.response_cache import JOB_DETAIL, invalidate_detail
+from .detection import PENDING_DETECTION
 
 User = get_user_model()
 
@@ -60,6 +68,14 @@ class Job(models.Model):
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="created_jobs"
     )
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="job_search_vector_gin"),
+            # keyset pagination of the listing, newest first
+            models.Index(fields=["-created_at", "-id"], name="job_keyset_idx"),
+        ]
 
     def clean(self):
         super().clean()
@@ -78,6 +94,214 @@ class Job(models.Model):
         return f"{self.title} - {self.company}"
 
 
+class JobCard(models.Model):
+    """
+    Denormalized listing row of a job, so list pages read one narrow row
+    instead of joining the company, office, city and country. Kept in sync by
+    the receivers below; `python manage.py rebuild_job_cards` repopulates it.
+    """
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="card"
+    )
+    title = models.CharField(max_length=255)
+    company_name = models.CharField(max_length=255)
+    city_name = models.CharField(max_length=200, null=True, blank=True)
+    country_name = models.CharField(max_length=200, null=True, blank=True)
+    job_type = models.CharField(max_length=2, choices=Job.JobType.choices)
+    work_place = models.CharField(max_length=6, choices=Job.WorkPlace.choices)
+    salary_start_from = models.PositiveIntegerField()
+    salary_end = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.title
+
+
+class JobTermVector(models.Model):
+    """
+    Term counts of a job's text (title, overview, requirements and
+    responsibilities), precomputed for the BM25 recommendation index in
+    `job.recommend`.
+    """
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="term_vector"
+    )
+    terms = models.JSONField(default=dict)
+    length = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class JobApplicationQuerySet(models.QuerySet):
+    def _transition(self, status):
+        """
+        Move the applications that may reach `status` to it in one statement,
+        returning the ids moved. The rows are locked before they are updated,
+        so the hiring funnel rollups, adjusted by the same statement, move
+        them out of the statuses actually replaced.
+        """
+        from .funnel import funnel_upsert_sql
+
+        candidates, params = (
+            self.filter(status__in=JobApplication.predecessors(status))
+            .order_by()
+            .values("pk")
+            .query.sql_with_params()
+        )
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH old AS (
+                    SELECT id, job_id, created_at, status FROM {table}
+                    WHERE id IN ({candidates}) AND status IN %s
+                    FOR UPDATE
+                ),
+                moved AS (
+                    UPDATE {table} application
+                    SET status = %s, updated_at = %s
+                    FROM old WHERE application.id = old.id
+                    RETURNING old.id, old.job_id, old.created_at, old.status
+                ),
+                changes AS (
+                    SELECT job_id, created_at, status, -1 AS delta FROM moved
+                    UNION ALL
+                    SELECT job_id, created_at, %s, 1 FROM moved
+                ),
+                funnel AS ({funnel_upsert_sql(connection, "changes")})
+                SELECT id FROM moved
+                """,
+                [
+                    *params,
+                    tuple(JobApplication.predecessors(status)),
+                    status,
+                    timezone.now(),
+                    status,
+                    timezone.get_current_timezone_name(),
+                ],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def transition(self, status):
+        """
+        Move the applications that may reach `status` to it in a single
+        conditional UPDATE, returning how many moved; applications changed
+        concurrently to a status that forbids it are left alone.
+        """
+        return len(self._transition(status))
+
+    def bulk_transition(self, status):
+        """
+        Set-based `transition` for many applications that returns the ids it
+        moved, leaving out those already in `status`.
+        """
+        return self.exclude(status=status)._transition(status)
+
+    def apply(self, user, job_id, resume_id, cover_letter, idempotency_key=None):
+        """
+        Create an application in one round trip: an INSERT ... SELECT that
+        only yields a row when the job exists and the resume belongs to
+        `user`, with ON CONFLICT DO NOTHING absorbing a second application to
+        the job or a reused idempotency key. Returns the new application, or
+        None when nothing was inserted. The letter gets its local pre-filter
+        score (and report, when that settles it) right away, the same
+        statement counts it in the hiring funnel rollups, and `post_save` is
+        sent as `save()` would.
+        """
+        from users.models import Resume
+        from .detection import (
+            SCORE_DELAY,
+            SCORE_TASK,
+            is_worth_checking,
+            preliminary_detection,
+        )
+        from .funnel import funnel_upsert_sql
+        from .outbox import outbox_insert_sql
+
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        now = timezone.now()
+        ai_score = ai_report = None
+        if is_worth_checking(cover_letter):
+            [(ai_score, ai_report)] = preliminary_detection([cover_letter])
+        # ambiguous letters queue a drain for ZeroGPT in the same statement
+        schedule = ai_score is not None and ai_report is None
+        outbox = f", outbox AS ({outbox_insert_sql(connection, 'inserted')})"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH inserted AS (
+                    INSERT INTO {quote(self.model._meta.db_table)} (
+                        user_id, job_id, resume_id, cover_letter, status,
+                        is_cover_letter_ai_generated, is_cover_letter_ai_report,
+                        idempotency_key, created_at, updated_at
+                    )
+                    SELECT %s, job.id, resume.id, %s, %s, %s, %s::jsonb, %s, %s, %s
+                    FROM {quote(Job._meta.db_table)} job
+                    JOIN {quote(Resume._meta.db_table)} resume
+                        ON resume.id = %s AND resume.user_id = %s
+                    WHERE job.id = %s
+                    ON CONFLICT DO NOTHING
+                    RETURNING id, job_id, created_at, status, 1 AS delta
+                ),
+                funnel AS ({funnel_upsert_sql(connection, "inserted")})
+                {outbox if schedule else ""}
+                SELECT id FROM inserted
+                """,
+                [
+                    user.pk,
+                    cover_letter,
+                    JobApplication.JobApplicationStatus.APPLIED,
+                    ai_score,
+                    json.dumps(ai_report) if ai_report else None,
+                    idempotency_key,
+                    now,
+                    now,
+                    resume_id,
+                    user.pk,
+                    job_id,
+                    timezone.get_current_timezone_name(),
+                    *(
+                        [SCORE_TASK, now, now + timedelta(seconds=SCORE_DELAY)]
+                        if schedule
+                        else []
+                    ),
+                ],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+
+        application = self.model(
+            id=row[0],
+            user=user,
+            job_id=job_id,
+            resume_id=resume_id,
+            cover_letter=cover_letter,
+            is_cover_letter_ai_generated=ai_score,
+            is_cover_letter_ai_report=ai_report,
+            idempotency_key=idempotency_key,
+            created_at=now,
+            updated_at=now,
+        )
+        application._state.adding = False
+        application._state.db = self.db
+        application._loaded_status = application.status
+        application._counted_in_funnel = True
+        application._scoring_scheduled = schedule
+        post_save.send(
+            sender=self.model,
+            instance=application,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=self.db,
+        )
+        return application
+
+
 class JobApplication(models.Model):
     class JobApplicationStatus(models.TextChoices):
         APPLIED = "A", "Applied"
@@ -85,6 +309,21 @@ class JobApplication(models.Model):
         INVITED = "I", "Invited"
         HIRED = "H", "Hired"
 
+    # status -> statuses it may move to, besides staying where it is
+    STATUS_TRANSITIONS = {
+        JobApplicationStatus.APPLIED: {
+            JobApplicationStatus.REJECTED,
+            JobApplicationStatus.INVITED,
+            JobApplicationStatus.HIRED,
+        },
+        JobApplicationStatus.INVITED: {
+            JobApplicationStatus.REJECTED,
+            JobApplicationStatus.HIRED,
+        },
+        JobApplicationStatus.REJECTED: set(),
+        JobApplicationStatus.HIRED: set(),
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -100,6 +339,14 @@ class JobApplication(models.Model):
         null=True, blank=True, default=None
     )
     is_cover_letter_ai_report = models.JSONField(null=True, blank=True)
+    # until when a drain has claimed the letter (see `score_pending_applications`)
+    ai_detection_claimed_until = models.DateTimeField(null=True, blank=True)
+    # client supplied `Idempotency-Key` of the request that created it
+    idempotency_key = models.CharField(
+        max_length=255, null=True, blank=True, editable=False
+    )
+
+    objects = JobApplicationQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.job.title} - {self.status}"
@@ -107,30 +354,139 @@ class JobApplication(models.Model):
     def get_company(self):
         return self.job.company
 
-    def clean(self):
-        if self.pk:
-            try:
-                old = self.__class__.objects.get(pk=self.pk)
-                options = {
-                    "Applied": ["Applied", "Rejected", "Invited", "Hired"],
-                    "Invited": ["Invited", "Rejected", "Hired"],
-                    "Rejected": ["Rejected"],
-                    "Hired": ["Hired"],
-                }
-                if self.get_status_display() not in options[old.get_status_display()]:
-                    raise ValidationError(
-                        f"Cannot change status from {old.get_status_display()} to {self.get_status_display()}"
-                    )
+    @classmethod
+    def allowed_transition(cls, old_status, new_status):
+        return (
+            new_status == old_status or new_status in cls.STATUS_TRANSITIONS[old_status]
+        )
+
+    @classmethod
+    def predecessors(cls, status):
+        """
+        Statuses an application may move to `status` from.
+        """
+        return [
+            old for old in cls.STATUS_TRANSITIONS if cls.allowed_transition(old, status)
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remembered so `clean` can validate the transition without a query
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None or "status" in fields:
+            self._loaded_status = self.status
 
-            except self.__class__.DoesNotExist:
-                pass
+    def clean(self):
+        old_status = getattr(self, "_loaded_status", None)
+        if old_status is not None and not self.allowed_transition(
+            old_status, self.status
+        ):
+            raise ValidationError(
+                f"Cannot change status from "
+                f"{self.JobApplicationStatus(old_status).label} to "
+                f"{self.get_status_display()}"
+            )
 
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
     class Meta:
         unique_together = ["user", "job"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "idempotency_key"],
+                name="job_app_user_idempotency_key_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="job_app_user_keyset_idx"
+            ),
+            models.Index(
+                fields=["job", "is_cover_letter_ai_generated", "id"],
+                name="job_app_applicants_keyset_idx",
+            ),
+            models.Index(
+                fields=["job", "status", "is_cover_letter_ai_generated", "id"],
+                name="job_app_status_keyset_idx",
+            ),
+            # the applications still to be scored, drained in id order
+            models.Index(
+                fields=["id"],
+                condition=PENDING_DETECTION,
+                name="job_app_ai_pending_idx",
+            ),
+        ]
+
+
+class HiringFunnel(models.Model):
+    """
+    Applications to a job made on `day`, counted by their current status.
+    Kept up to date as applications are created, moved and deleted (see
+    `job.funnel`), so dashboards never aggregate the applications table.
+    """
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="funnel")
+    # denormalized from the job for company wide rollups
+    company = models.ForeignKey("company.Company", on_delete=models.CASCADE)
+    day = models.DateField()
+    applied = models.IntegerField(default=0)
+    invited = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    hired = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "day"], name="job_funnel_job_day_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["company", "day"], name="job_funnel_company_day_idx"),
+        ]
+
+
+class AIDetectionResult(models.Model):
+    """
+    ZeroGPT report of a text, keyed by the SHA-256 of its normalized content
+    (see `job.detection`), so repeated cover letters are not sent again.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    report = models.JSONField()
+    score = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class OutboxMessage(models.Model):
+    """
+    Celery task call recorded in the transaction of the change needing it,
+    and published by the relay once that commits (see `job.outbox`), so a
+    task never runs before its rows exist and a broker outage loses nothing.
+    """
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # not published before: a countdown, or the backoff after failed attempts
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"], name="job_outbox_available_idx"
+            ),
+        ]
 
 
 class JobBookmark(models.Model):
@@ -143,20 +499,198 @@ class JobBookmark(models.Model):
 
     class Meta:
         unique_together = ["user", "job"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="job_bookmark_user_keyset_idx",
+            ),
+        ]
 
 
-@receiver(post_save, sender=JobApplication)
-def increment_job_applicants(sender, instance, **kwargs):
-    job = instance.job
-    job.number_of_applicants += 1
-    job.save()
+@receiver(post_save, sender=Job)
+def refresh_job_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"title", "overview"} & set(update_fields):
+        return
+    from job.search import update_search_vector
 
+    update_search_vector([instance.pk])
 
-@receiver(post_save, sender=JobApplication)  # start task
-def start_is_cover_letter_ai_generated(sender, instance, created, **kwargs):
-    if settings.TESTING:
+
+@receiver(post_save, sender=JobRequirement)
+@receiver(post_save, sender=JobResponsibility)
+@receiver(post_delete, sender=JobRequirement)
+@receiver(post_delete, sender=JobResponsibility)
+def refresh_parent_job_search_vector(sender, instance, **kwargs):
+    from job.search import update_search_vector
+
+    update_search_vector([instance.job_id])
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_term_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"title", "overview"} & set(update_fields):
+        return
+    from job.recommend import update_term_vectors
+
+    update_term_vectors([instance.pk])
+
+
+@receiver(post_save, sender=JobRequirement)
+@receiver(post_save, sender=JobResponsibility)
+@receiver(post_delete, sender=JobRequirement)
+@receiver(post_delete, sender=JobResponsibility)
+def refresh_parent_job_term_vector(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Job):
+        # the job itself is being deleted, taking its vector with it
         return
+    from job.recommend import update_term_vectors
+
+    update_term_vectors([instance.job_id])
+
+
+@receiver(post_delete, sender=Job)
+def expire_recommendation_index(sender, instance, **kwargs):
+    from job.recommend import invalidate_recommendation_index
+
+    job_id = instance.pk  # cleared once the deletion is done
+    transaction.on_commit(lambda: invalidate_recommendation_index([job_id]))
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=JobRequirement)
+@receiver(post_delete, sender=JobRequirement)
+@receiver(post_save, sender=JobResponsibility)
+@receiver(post_delete, sender=JobResponsibility)
+def expire_job_facets(sender, **kwargs):
+    from job.facets import invalidate_job_facets
+
+    invalidate_job_facets()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_detail(sender, instance, **kwargs):
+    invalidate_detail(JOB_DETAIL, instance.pk)
+
+
+@receiver(post_save, sender=JobRequirement)
+@receiver(post_delete, sender=JobRequirement)
+@receiver(post_save, sender=JobResponsibility)
+@receiver(post_delete, sender=JobResponsibility)
+def invalidate_parent_job_detail(sender, instance, **kwargs):
+    invalidate_detail(JOB_DETAIL, instance.job_id)
+
+
+def invalidate_company_job_details(company_id):
+    # job detail nests the company with all of its offices
+    job_ids = Job.objects.filter(company_id=company_id).values_list("pk", flat=True)
+    invalidate_detail(JOB_DETAIL, *job_ids)
+
+
+@receiver(post_save, sender="company.Company")
+@receiver(post_delete, sender="company.Company")
+def invalidate_job_details_on_company_change(sender, instance, **kwargs):
+    invalidate_company_job_details(instance.pk)
+
+
+@receiver(post_save, sender="company.CompanyOffice")
+@receiver(post_delete, sender="company.CompanyOffice")
+def invalidate_job_details_on_office_change(sender, instance, **kwargs):
+    invalidate_company_job_details(instance.company_id)
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_card(sender, instance, update_fields=None, **kwargs):
+    from job.cards import CARD_SOURCE_FIELDS, refresh_job_cards
+
+    if update_fields is not None and not CARD_SOURCE_FIELDS & set(update_fields):
+        return
+    refresh_job_cards(Job.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender="company.Company")
+def refresh_company_job_cards(sender, instance, **kwargs):
+    from job.cards import refresh_job_cards
+
+    refresh_job_cards(Job.objects.filter(company=instance))
+
+
+@receiver(post_save, sender="company.CompanyOffice")
+def refresh_office_job_cards(sender, instance, **kwargs):
+    from job.cards import refresh_job_cards
+
+    refresh_job_cards(Job.objects.filter(company_office=instance))
+
+
+@receiver(post_save, sender="cities_light.City")
+def refresh_city_job_cards(sender, instance, created, raw=False, **kwargs):
+    if skip_place_refresh(instance, created, raw):
+        return
+    from job.cards import refresh_job_cards
+
+    refresh_job_cards(Job.objects.filter(company_office__city=instance))
+
+
+@receiver(post_save, sender="cities_light.Country")
+def refresh_country_job_cards(sender, instance, created, raw=False, **kwargs):
+    if skip_place_refresh(instance, created, raw):
+        return
+    from job.cards import refresh_job_cards
+
+    refresh_job_cards(Job.objects.filter(company_office__country=instance))
+
+
+@receiver(post_save, sender=JobApplication)
+def increment_job_applicants(sender, instance, created, **kwargs):
     if created:
-        from job.tasks import is_cover_letter_ai_generated_task
+        from job.counters import record_application
+
+        record_application(instance.job_id)
+
 
-        is_cover_letter_ai_generated_task.delay(instance.id)
+@receiver(post_save, sender=JobApplication)
+def count_application_in_funnel(sender, instance, created, using, **kwargs):
+    from job.funnel import record_funnel_changes
+
+    if created:
+        if getattr(instance, "_counted_in_funnel", False):  # by `apply()`
+            return
+        changes = [(instance.job_id, instance.created_at, instance.status, 1)]
+    else:
+        # `save()` changing the status; `_loaded_status` is updated after
+        # post_save, so it still holds the old one
+        old_status = getattr(instance, "_loaded_status", None)
+        if old_status is None or old_status == instance.status:
+            return
+        changes = [
+            (instance.job_id, instance.created_at, old_status, -1),
+            (instance.job_id, instance.created_at, instance.status, 1),
+        ]
+    record_funnel_changes(changes, using=using)
+
+
+@receiver(post_delete, sender=JobApplication)
+def uncount_application_in_funnel(sender, instance, using, origin=None, **kwargs):
+    from company.models import Company
+    from job.funnel import record_funnel_changes
+
+    # the rollups of a deleted job or company go with it
+    if isinstance(origin, (Job, Company)):
+        return
+    record_funnel_changes(
+        [(instance.job_id, instance.created_at, instance.status, -1)], using=using
+    )
+
+
+@receiver(post_save, sender=JobApplication)  # start task
+def start_is_cover_letter_ai_generated(sender, instance, created, using, **kwargs):
+    from job.detection import is_worth_checking, schedule_pending_scoring
+
+    if (
+        created
+        and not getattr(instance, "_scoring_scheduled", False)  # by `apply()`
+        and instance.is_cover_letter_ai_report is None
+        and is_worth_checking(instance.cover_letter)
+    ):
+        schedule_pending_scoring(using=using)
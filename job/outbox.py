@@ -0,0 +1,125 @@
+import json
+from datetime import timedelta
+
+from celery import current_app
+from django.db import transaction
+from django.utils import timezone
+from kombu.exceptions import KombuError
+
+OUTBOX_BATCH_SIZE = 500
+# seconds before retrying a message that failed to publish, doubled on each
+# failed attempt up to the maximum
+RETRY_BACKOFF = 5
+MAX_RETRY_BACKOFF = 60 * 10
+
+
+def enqueue(task, args=(), kwargs=None, countdown=0, using="default"):
+    """
+    Record a call of the Celery task named `task` in the current
+    transaction, for the relay to publish once it commits, no sooner than
+    `countdown` seconds from now.
+    """
+    from .models import OutboxMessage
+
+    return OutboxMessage.objects.using(using).create(
+        task=task,
+        args=list(args),
+        kwargs=kwargs or {},
+        available_at=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def outbox_insert_sql(connection, source):
+    """
+    SQL recording an argumentless call of a task for each row of the
+    relation named `source`, as a data-modifying CTE of the statement
+    creating them. Takes the task name, the creation time and the time it
+    becomes available as parameters.
+    """
+    from .models import OutboxMessage
+
+    return f"""
+        INSERT INTO {connection.ops.quote_name(OutboxMessage._meta.db_table)} (
+            task, args, kwargs, created_at, available_at, attempts, last_error
+        )
+        SELECT %s, '[]'::jsonb, '{{}}'::jsonb, %s, %s, 0, ''
+        FROM {source}
+    """
+
+
+def _call_key(message):
+    return (
+        message.task,
+        json.dumps(message.args),
+        json.dumps(message.kwargs, sort_keys=True),
+    )
+
+
+def _relay_batch(batch_size, app, using):
+    """
+    Publish one locked batch of due messages. Identical calls are published
+    once, all over a single broker connection; published messages are
+    deleted in the transaction that locked them, so another relay never
+    sends them again, and the rest are pushed back. Returns the number of
+    messages published and the size of the batch.
+    """
+    from .models import OutboxMessage
+
+    with transaction.atomic(using=using):
+        messages = list(
+            OutboxMessage.objects.using(using)
+            .filter(available_at__lte=timezone.now())
+            .select_for_update(skip_locked=True)
+            .order_by("available_at", "id")[:batch_size]
+        )
+        calls = {}
+        for message in messages:
+            calls.setdefault(_call_key(message), []).append(message)
+
+        published = []
+        error = None
+        with app.producer_or_acquire() as producer:
+            for message, *duplicates in calls.values():
+                try:
+                    app.send_task(
+                        message.task,
+                        message.args,
+                        message.kwargs,
+                        producer=producer,
+                        retry=False,  # the relay retries on its next pass
+                    )
+                except KombuError as exc:
+                    # the broker is likely down: leave the rest for later
+                    error = exc
+                    break
+                published += [message, *duplicates]
+
+        sent = {message.pk for message in published}
+        OutboxMessage.objects.using(using).filter(pk__in=sent).delete()
+        failed = [message for message in messages if message.pk not in sent]
+        now = timezone.now()
+        for message in failed:
+            message.attempts += 1
+            message.last_error = repr(error)
+            message.available_at = now + timedelta(
+                seconds=min(
+                    RETRY_BACKOFF * 2 ** (message.attempts - 1), MAX_RETRY_BACKOFF
+                )
+            )
+        OutboxMessage.objects.using(using).bulk_update(
+            failed, ["attempts", "last_error", "available_at"]
+        )
+    return len(published), len(messages)
+
+
+def relay_outbox(batch_size=OUTBOX_BATCH_SIZE, app=None, using="default"):
+    """
+    Publish the due outbox messages to Celery, a batch at a time, until
+    none are left or the broker fails. Returns the number published.
+    """
+    total = 0
+    while True:
+        published, size = _relay_batch(batch_size, app or current_app, using)
+        total += published
+        if size < batch_size or published < size:
+            return total
@@ -0,0 +1,17 @@
+from rest_framework.pagination import PageNumberPagination
+from job_board.pagination import KeysetPagination
+
+
+class RankedJobPagination(PageNumberPagination):
+    """
+    Page numbers for the search rank and distance orderings, which are
+    computed per query with no index a keyset cursor could seek.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ApplicantsPagination(KeysetPagination):
+    ordering = ("is_cover_letter_ai_generated", "id")
@@ -0,0 +1,383 @@
+import re
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import TextField, Value
+from django.db.models.functions import Coalesce
+from django_redis import get_redis_connection
+
+from .search import _joined_descriptions
+
+RECOMMENDATIONS_VERSION_KEY = "job-recommendations:version"
+# sorted set of job id -> index version it last changed in
+RECOMMENDATIONS_CHANGES_KEY = "job-recommendations:changes"
+# versions up to this one were dropped from the change log
+RECOMMENDATIONS_FLOOR_KEY = "job-recommendations:changes-floor"
+CHANGE_LOG_SIZE = 100_000  # versions kept in the change log
+SYNC_BATCH_SIZE = 2000
+# share of the jobs changed since the last build that triggers a rebuild
+MERGE_FRACTION = 0.1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# title terms count this many times, as a cheap field boost
+TITLE_WEIGHT = 3
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]*")
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be but by for from has have in is it its of on or our
+    that the their this to was we were will with you your
+    """.split()
+)
+
+
+def tokenize(text):
+    return [
+        token
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def _job_term_counts(job):
+    counts = Counter(tokenize(job["title"]) * TITLE_WEIGHT)
+    for field in ("overview", "requirements_text", "responsibilities_text"):
+        counts.update(tokenize(job[field]))
+    return counts
+
+
+def update_term_vectors(job_ids):
+    """
+    Recompute the stored BM25 term counts of the given jobs: one SELECT of
+    their text and one upsert. In-process indexes are expired once the
+    transaction commits, so they never sync before the new rows are visible.
+    """
+    from .models import Job, JobRequirement, JobResponsibility, JobTermVector
+
+    jobs = (
+        Job.objects.filter(pk__in=job_ids)
+        .annotate(
+            requirements_text=Coalesce(
+                _joined_descriptions(JobRequirement),
+                Value(""),
+                output_field=TextField(),
+            ),
+            responsibilities_text=Coalesce(
+                _joined_descriptions(JobResponsibility),
+                Value(""),
+                output_field=TextField(),
+            ),
+        )
+        .values("pk", "title", "overview", "requirements_text", "responsibilities_text")
+    )
+    vectors = []
+    for job in jobs:
+        counts = _job_term_counts(job)
+        vectors.append(
+            JobTermVector(
+                job_id=job["pk"], terms=dict(counts), length=sum(counts.values())
+            )
+        )
+    JobTermVector.objects.bulk_create(
+        vectors,
+        update_conflicts=True,
+        unique_fields=["job"],
+        update_fields=["terms", "length", "updated_at"],
+    )
+    transaction.on_commit(lambda: invalidate_recommendation_index(job_ids))
+
+
+# Lua, so the version bump and its change log entries are seen together:
+# KEYS = version, change log, log floor; ARGV = log size, changed job ids
+_RECORD_CHANGES = """
+local version = redis.call('INCR', KEYS[1])
+for i = 2, #ARGV do
+    redis.call('ZADD', KEYS[2], version, ARGV[i])
+end
+local floor = version - tonumber(ARGV[1])
+if floor > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', floor)
+    redis.call('SET', KEYS[3], floor)
+end
+return version
+"""
+
+
+def invalidate_recommendation_index(job_ids=()):
+    """
+    Bump the index version, logging `job_ids` as changed in it so in-process
+    indexes reload only their vectors.
+    """
+    get_redis_connection("default").eval(
+        _RECORD_CHANGES,
+        3,
+        RECOMMENDATIONS_VERSION_KEY,
+        RECOMMENDATIONS_CHANGES_KEY,
+        RECOMMENDATIONS_FLOOR_KEY,
+        CHANGE_LOG_SIZE,
+        *job_ids,
+    )
+
+
+class _Segment(NamedTuple):
+    job_ids: np.ndarray  # document number -> job id
+    term_ptr: np.ndarray  # term id -> start of its postings
+    postings: np.ndarray  # document numbers, grouped by term
+    weights: np.ndarray  # BM25 term-frequency component of each posting
+
+    def score(self, terms, boosts):
+        # terms added to the vocabulary after the segment was built
+        inside = terms < len(self.term_ptr) - 1
+        terms, boosts = terms[inside], boosts[inside]
+        starts = self.term_ptr[terms]
+        sizes = self.term_ptr[terms + 1] - starts
+        # positions of every posting of every query term, without a Python loop
+        offsets = np.repeat(starts - np.cumsum(sizes) + sizes, sizes)
+        positions = offsets + np.arange(sizes.sum())
+        return np.bincount(
+            self.postings[positions],
+            weights=self.weights[positions] * np.repeat(boosts, sizes),
+            minlength=len(self.job_ids),
+        ).astype(np.float32)
+
+
+def _segment(documents, n_terms, average_length):
+    """
+    Term-major postings of `documents` ({job id: (term ids, counts)}).
+    """
+    job_ids = np.fromiter(documents, dtype=np.int64, count=len(documents))
+    if not documents:
+        return _Segment(
+            job_ids,
+            np.zeros(n_terms + 1, dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float32),
+        )
+    rows = list(documents.values())
+    lengths = np.array([len(term_ids) for term_ids, _ in rows])
+    term_ids = np.concatenate([term_ids for term_ids, _ in rows])
+    counts = np.concatenate([counts for _, counts in rows])
+    docs = np.repeat(np.arange(len(rows), dtype=np.int32), lengths)
+    doc_length = np.bincount(docs, weights=counts, minlength=len(rows))
+    norm = K1 * (1 - B + B * doc_length / average_length)
+
+    order = np.argsort(term_ids, kind="stable")
+    term_ids, docs, counts = term_ids[order], docs[order], counts[order]
+    return _Segment(
+        job_ids=job_ids,
+        term_ptr=np.concatenate(
+            ([0], np.cumsum(np.bincount(term_ids, minlength=n_terms)))
+        ),
+        postings=docs,
+        weights=(counts * (K1 + 1) / (counts + norm[docs])).astype(np.float32),
+    )
+
+
+class _IndexArrays(NamedTuple):
+    base: _Segment
+    live: np.ndarray  # base document number -> not changed or deleted since
+    delta: _Segment  # jobs changed since the base was built
+    idf: np.ndarray  # term id -> inverse document frequency
+
+
+class RecommendationIndex:
+    """
+    In-memory BM25 index over the stored job term vectors, laid out as
+    term-major postings so a query is scored with a few NumPy gathers and a
+    `bincount` per segment. Synced lazily when the version key moves: only
+    the jobs logged as changed are reloaded, their old postings in the base
+    segment are masked out and their new ones go to a small delta segment,
+    which is merged into the base once it grows past `MERGE_FRACTION` of
+    the jobs. Document frequencies are kept exact; the length normalization
+    of the base postings uses the average length at its last build.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.documents = {}  # job id -> (term ids, counts)
+        self.vocabulary = {}
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+        self.total_length = 0.0
+        self._lock = threading.Lock()
+        self._build()
+
+    def sync(self):
+        redis = get_redis_connection("default")
+        version = int(redis.get(RECOMMENDATIONS_VERSION_KEY) or 0)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            floor = int(redis.get(RECOMMENDATIONS_FLOOR_KEY) or 0)
+            if self.version is None or self.version < floor:
+                # first load, or changes dropped from the log since the last
+                self.documents = {}
+                self._load(None)
+                self._build()
+            else:
+                changed = redis.zrangebyscore(
+                    RECOMMENDATIONS_CHANGES_KEY, f"({self.version}", version
+                )
+                self._apply({int(job_id) for job_id in changed})
+            self.version = version
+
+    def _load(self, job_ids):
+        """
+        Read the vectors of `job_ids` (all of them for None) into
+        `documents`, returning the ids found.
+        """
+        from .models import JobTermVector
+
+        vectors = JobTermVector.objects.order_by("job_id").values_list(
+            "job_id", "terms"
+        )
+        if job_ids is not None:
+            vectors = vectors.filter(job_id__in=job_ids)
+        found = set()
+        for job_id, terms in vectors.iterator(chunk_size=SYNC_BATCH_SIZE):
+            term_ids = np.fromiter(
+                (
+                    self.vocabulary.setdefault(term, len(self.vocabulary))
+                    for term in terms
+                ),
+                dtype=np.int32,
+                count=len(terms),
+            )
+            counts = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+            self.documents[job_id] = (term_ids, counts)
+            found.add(job_id)
+        return found
+
+    def _count(self, job_ids, sign):
+        """
+        Add (or with a negative `sign`, take out) the documents of `job_ids`
+        to the document frequencies and total length.
+        """
+        self.document_frequency = np.pad(
+            self.document_frequency,
+            (0, len(self.vocabulary) - len(self.document_frequency)),
+        )
+        for job_id in job_ids:
+            term_ids, counts = self.documents[job_id]
+            self.document_frequency[term_ids] += sign
+            self.total_length += sign * float(counts.sum())
+
+    def _idf(self):
+        n_docs = len(self.documents)
+        df = self.document_frequency
+        return np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def _average_length(self):
+        return self.total_length / len(self.documents) if self.documents else 1.0
+
+    def _build(self):
+        self.document_frequency = np.zeros(len(self.vocabulary), dtype=np.int64)
+        self.total_length = 0.0
+        self._count(self.documents, 1)
+        base = _segment(
+            self.documents, len(self.vocabulary), self._average_length() or 1.0
+        )
+        self.base_positions = {
+            job_id: position for position, job_id in enumerate(self.documents)
+        }
+        self.changed = set()  # jobs whose postings are in the delta
+        # swapped in as a whole, so concurrent `score` calls see one version
+        self.arrays = _IndexArrays(
+            base=base,
+            live=np.ones(len(base.job_ids), dtype=bool),
+            delta=_segment({}, len(self.vocabulary), 1.0),
+            idf=self._idf(),
+        )
+
+    def _apply(self, job_ids):
+        """
+        Reload the vectors of the changed `job_ids`, deleted jobs included.
+        """
+        known = job_ids & self.documents.keys()
+        self._count(known, -1)
+        for job_id in known:
+            del self.documents[job_id]
+        found = self._load(job_ids)
+        self._count(found, 1)
+
+        self.changed = (self.changed - job_ids) | found
+        if len(self.changed) > MERGE_FRACTION * len(self.documents):
+            self._build()
+            return
+        live = self.arrays.live.copy()
+        for job_id in job_ids & self.base_positions.keys():
+            live[self.base_positions[job_id]] = False
+        self.arrays = _IndexArrays(
+            base=self.arrays.base,
+            live=live,
+            delta=_segment(
+                {job_id: self.documents[job_id] for job_id in self.changed},
+                len(self.vocabulary),
+                self._average_length() or 1.0,
+            ),
+            idf=self._idf(),
+        )
+
+    def score(self, text):
+        """
+        BM25 score of every indexed job against `text`, as (job ids, scores).
+        Repeated query terms are damped logarithmically, since a resume is a
+        long document rather than a short keyword query.
+        """
+        arrays = self.arrays
+        job_ids = np.concatenate((arrays.base.job_ids, arrays.delta.job_ids))
+        n_terms = len(arrays.idf)
+        query = Counter(
+            term
+            for term in map(self.vocabulary.get, tokenize(text))
+            if term is not None and term < n_terms
+        )
+        if not query:
+            return job_ids, np.zeros(len(job_ids), dtype=np.float32)
+
+        terms = np.fromiter(query, dtype=np.int64, count=len(query))
+        boosts = (
+            np.log1p(np.fromiter(query.values(), dtype=np.float32)) * arrays.idf[terms]
+        )
+        scores = np.concatenate(
+            (
+                arrays.base.score(terms, boosts) * arrays.live,
+                arrays.delta.score(terms, boosts),
+            )
+        )
+        return job_ids, scores
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_recommendation_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RecommendationIndex()
+    _index.sync()
+    return _index
+
+
+def recommend_jobs(text, limit=20, exclude=()):
+    """
+    Ids and scores of the `limit` best matching jobs for `text`, best first,
+    skipping jobs in `exclude` and jobs sharing no term with it.
+    """
+    job_ids, scores = get_recommendation_index().score(text)
+    if exclude:
+        scores[np.isin(job_ids, list(exclude))] = 0
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    ranked = candidates[np.lexsort((-job_ids[candidates], -scores[candidates]))]
+    return [(int(job_ids[i]), float(scores[i])) for i in ranked]
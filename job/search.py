@@ -0,0 +1,132 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .geo import within_radius
+
+SEARCH_CONFIG = "english"
+
+# salary_band filter / facet value -> (inclusive lower, exclusive upper) bound
+# on `salary_start_from`.
+SALARY_BANDS = {
+    "0-50k": (0, 50_000),
+    "50k-100k": (50_000, 100_000),
+    "100k-150k": (100_000, 150_000),
+    "150k+": (150_000, None),
+}
+
+
+def _joined_descriptions(model):
+    return Subquery(
+        model.objects.filter(job=OuterRef("pk"))
+        .values("job")
+        .annotate(text=StringAgg("description", delimiter=" "))
+        .values("text")
+    )
+
+
+def job_search_vector():
+    """
+    Weighted search document for a job: title (A), overview (B) and the
+    descriptions of its requirements and responsibilities (C).
+    """
+    from .models import JobRequirement, JobResponsibility
+
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("overview", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(
+            _joined_descriptions(JobRequirement), weight="C", config=SEARCH_CONFIG
+        )
+        + SearchVector(
+            _joined_descriptions(JobResponsibility), weight="C", config=SEARCH_CONFIG
+        )
+    )
+
+
+def update_search_vector(job_ids):
+    """
+    Recompute the stored search vector of the given jobs in a single UPDATE.
+    """
+    from .models import Job
+
+    Job.objects.filter(pk__in=job_ids).update(search_vector=job_search_vector())
+
+
+def search_query(query):
+    return SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+
+
+def salary_band_q(band):
+    lower, upper = SALARY_BANDS[band]
+    condition = Q(salary_start_from__gte=lower)
+    if upper is not None:
+        condition &= Q(salary_start_from__lt=upper)
+    return condition
+
+
+def filter_jobs(queryset, filters):
+    """
+    Apply validated search filters (see `JobSearchFilterSerializer`). A `q`
+    matches through the GIN-indexed `search_vector` column and an `origin`
+    keeps jobs within `radius_km` of it.
+    """
+    if filters.get("q"):
+        queryset = queryset.filter(search_vector=search_query(filters["q"]))
+    if filters.get("job_type"):
+        queryset = queryset.filter(job_type=filters["job_type"])
+    if filters.get("work_place"):
+        queryset = queryset.filter(work_place=filters["work_place"])
+    if filters.get("country"):
+        queryset = queryset.filter(company_office__country=filters["country"])
+    if filters.get("salary_band"):
+        queryset = queryset.filter(salary_band_q(filters["salary_band"]))
+    if filters.get("origin"):
+        latitude, longitude = filters["origin"]
+        queryset = within_radius(queryset, latitude, longitude, filters["radius_km"])
+    return queryset
+
+
+def rank_jobs(queryset, query):
+    """
+    Order `queryset` by relevance to `query` (websearch syntax), best first.
+    """
+    return queryset.annotate(
+        rank=SearchRank(F("search_vector"), search_query(query))
+    ).order_by("-rank", "-id")
+
+
+def filter_applications(queryset, filters):
+    """
+    Narrow a job's applications by status, AI score range, application
+    date (whole days, in the current time zone) and resume skills.
+    """
+    if filters.get("status"):
+        queryset = queryset.filter(status__in=filters["status"])
+    if "ai_score_min" in filters:
+        queryset = queryset.filter(
+            is_cover_letter_ai_generated__gte=filters["ai_score_min"]
+        )
+    if "ai_score_max" in filters:
+        queryset = queryset.filter(
+            is_cover_letter_ai_generated__lte=filters["ai_score_max"]
+        )
+    if "applied_after" in filters:
+        queryset = queryset.filter(
+            created_at__gte=_start_of_day(filters["applied_after"])
+        )
+    if "applied_before" in filters:
+        queryset = queryset.filter(
+            created_at__lt=_start_of_day(filters["applied_before"] + timedelta(days=1))
+        )
+    if filters.get("skills"):
+        # `@>` on the GIN indexed skills of the resumes
+        queryset = queryset.filter(resume__skills__contains=filters["skills"])
+    return queryset
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
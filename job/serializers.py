@@ -1,10 +1,24 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from users.models import Resume
-from .models import JobBookmark, Job, JobRequirement, JobResponsibility, JobApplication
+from .models import (
+    JobBookmark,
+    Job,
+    JobCard,
+    JobRequirement,
+    JobResponsibility,
+    JobApplication,
+)
+from company.models import CompanyOffice
+from cities_light.models import City
 from company.serializers import CompanySerializer
-from .validators import job_user_unique
+from .search import SALARY_BANDS
+from .cards import CARD_FIELDS
+from .exports import EXPORT_FORMATS
+from .funnel import PERIODS
 from users.serializers import UserSerializer
+from users.parsing import MAX_SKILL_LENGTH, normalize_skill
 from company.serializers import CompanyOfficeSerializer
+from job_board.prefetch import PrefetchPlanMixin
 
 
 class JobRequirementSerializer(serializers.ModelSerializer):
@@ -19,14 +33,28 @@ class JobResponsibilitySerializer(serializers.ModelSerializer):
         fields = ["description"]
 
 
-class BookmarkSerializersList(serializers.ModelSerializer):
+class JobCardSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="job_id", read_only=True)
+    job_type = serializers.CharField(source="get_job_type_display", read_only=True)
+    work_place = serializers.CharField(source="get_work_place_display", read_only=True)
+
+    class Meta:
+        model = JobCard
+        fields = ["id", *CARD_FIELDS]
+
+
+class BookmarkSerializersList(PrefetchPlanMixin, serializers.ModelSerializer):
+    select_related = ("job__card",)
+    only = ("id", "job_id", "created_at", *(f"job__card__{f}" for f in CARD_FIELDS))
+
     job = serializers.HyperlinkedRelatedField(
         view_name="job-detail-update", read_only=True
     )
+    card = JobCardSerializer(source="job.card", read_only=True)
 
     class Meta:
         model = JobBookmark
-        fields = ["job", "created_at", "id"]
+        fields = ["job", "card", "created_at", "id"]
 
 
 class BookmarkCreateSerializer(serializers.ModelSerializer):
@@ -54,7 +82,21 @@ class BookmarkDestroySerializers(serializers.ModelSerializer):
         fields = ["job"]
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
+    select_related = (
+        "company",
+        "company_office__city",
+        "company_office__country",
+    )
+    prefetch_related = (
+        Prefetch(
+            "company__offices",
+            queryset=CompanyOffice.objects.select_related("city", "country"),
+        ),
+        "requirements",
+        "responsibilities",
+    )
+
     company = CompanySerializer(read_only=True)
     job_type = serializers.CharField(source="get_job_type_display", read_only=True)
     work_place = serializers.CharField(source="get_work_place_display", read_only=True)
@@ -64,10 +106,119 @@ class JobSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Job
-        exclude = ["created_by"]
+        exclude = ["created_by", "search_vector"]
         # fields = "__all__"
 
 
+class JobListSerializer(PrefetchPlanMixin, serializers.Serializer):
+    """
+    Listing row of a job: its denormalized card plus the search annotations.
+    """
+
+    select_related = ("card",)
+    only = ("id", "created_at", *(f"card__{field}" for field in CARD_FIELDS))
+
+    rank = serializers.FloatField(read_only=True, default=None)
+    distance_km = serializers.FloatField(read_only=True, default=None)
+
+    def to_representation(self, instance):
+        # jobs written without save(), e.g. bulk_create, have no card until
+        # `rebuild_job_cards` runs
+        card = getattr(instance, "card", None)
+        return {
+            "id": instance.pk,
+            **(JobCardSerializer(card).data if card else {}),
+            **super().to_representation(instance),
+        }
+
+
+class JobSearchFilterSerializer(serializers.Serializer):
+    q = serializers.CharField(required=False, allow_blank=True)
+    job_type = serializers.ChoiceField(choices=Job.JobType.choices, required=False)
+    work_place = serializers.ChoiceField(choices=Job.WorkPlace.choices, required=False)
+    country = serializers.IntegerField(required=False, min_value=1)
+    salary_band = serializers.ChoiceField(choices=list(SALARY_BANDS), required=False)
+    near_city = serializers.IntegerField(required=False, min_value=1)
+    radius_km = serializers.FloatField(
+        required=False, default=50, min_value=1, max_value=1000
+    )
+
+    def validate_q(self, value):
+        return value.strip()
+
+    def validate(self, attrs):
+        if attrs.get("near_city"):
+            city = (
+                City.objects.filter(id=attrs["near_city"])
+                .values("latitude", "longitude")
+                .first()
+            )
+            if city is None or city["latitude"] is None or city["longitude"] is None:
+                raise serializers.ValidationError(
+                    {"near_city": "City does not exist or has no coordinates."}
+                )
+            attrs["origin"] = (float(city["latitude"]), float(city["longitude"]))
+        else:
+            attrs.pop("radius_km", None)
+        return attrs
+
+
+class JobApplicationFilterSerializer(serializers.Serializer):
+    status = serializers.MultipleChoiceField(
+        choices=JobApplication.JobApplicationStatus.choices, required=False
+    )
+    ai_score_min = serializers.FloatField(required=False, min_value=0, max_value=100)
+    ai_score_max = serializers.FloatField(required=False, min_value=0, max_value=100)
+    applied_after = serializers.DateField(required=False)
+    applied_before = serializers.DateField(required=False)
+    # applicants whose resume lists all of them
+    skills = serializers.ListField(
+        child=serializers.CharField(max_length=MAX_SKILL_LENGTH),
+        required=False,
+        max_length=20,
+    )
+
+    def validate_skills(self, skills):
+        return [skill for skill in map(normalize_skill, skills) if skill]
+
+    def validate(self, attrs):
+        for low, high in (
+            ("ai_score_min", "ai_score_max"),
+            ("applied_after", "applied_before"),
+        ):
+            if low in attrs and high in attrs and attrs[low] > attrs[high]:
+                raise serializers.ValidationError(
+                    {low: f"Must not be greater than {high}."}
+                )
+        return attrs
+
+
+class JobApplicationExportSerializer(JobApplicationFilterSerializer):
+    # not `format`, which DRF reserves for picking a renderer
+    type = serializers.ChoiceField(choices=list(EXPORT_FORMATS), default="csv")
+
+
+class HiringFunnelQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=list(PERIODS), default="day")
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if (
+            attrs.get("since")
+            and attrs.get("until")
+            and attrs["since"] > attrs["until"]
+        ):
+            raise serializers.ValidationError({"since": "Must not be after `until`."})
+        return attrs
+
+
+class JobRecommendationQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        required=False, default=20, min_value=1, max_value=100
+    )
+
+
 class JobCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Job
@@ -83,29 +234,15 @@ class JobCreateSerializer(serializers.ModelSerializer):
 
 
 class JobApplicationSerializer(serializers.ModelSerializer):
-    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    # plain ids: the job and the resume ownership are checked by the INSERT
+    job = serializers.IntegerField(
+        min_value=1, error_messages={"invalid": "Invalid value."}
+    )
+    resume = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = JobApplication
-        fields = ["user", "job", "resume", "cover_letter"]
-        validators = [job_user_unique]
-        extra_kwargs = {
-            "job": {
-                "error_messages": {
-                    "does_not_exist": "Job Doesn't Exists",
-                    "invalid": "Invalid value.",
-                }
-            }
-        }
-
-    def validate(self, attrs):
-        user = self.context["request"].user
-        resume = attrs["resume"]
-        resume = Resume.objects.get(id=resume.id)
-        if resume is None or resume.user != user:
-            raise serializers.ValidationError("Resume does not exist.")
-
-        return super().validate(attrs)
+        fields = ["job", "resume", "cover_letter"]
 
 
 class JobApplicationListSerializer(serializers.ModelSerializer):
@@ -123,9 +260,29 @@ class JobApplicationListSerializer(serializers.ModelSerializer):
 
 
 class JobApplicationUpdateSerializer(serializers.ModelSerializer):
+    expected_status = serializers.ChoiceField(
+        choices=JobApplication.JobApplicationStatus.choices,
+        required=False,
+        write_only=True,
+        help_text="Apply the change only if the application is still in this "
+        "status; otherwise respond with 409 Conflict.",
+    )
+
     class Meta:
         model = JobApplication
-        fields = ["status"]
+        fields = ["status", "expected_status"]
+        extra_kwargs = {"status": {"required": True}}
+
+
+class JobApplicationBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+    status = serializers.ChoiceField(
+        choices=JobApplication.JobApplicationStatus.choices
+    )
 
 
 class JobUpdateSerializer(serializers.ModelSerializer):
@@ -142,7 +299,9 @@ class JobUpdateSerializer(serializers.ModelSerializer):
         ]
 
 
-class ListJobApplicationsSerializer(serializers.ModelSerializer):
+class ListJobApplicationsSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
+    select_related = ("user", "resume")
+
     resume = serializers.FileField(source="resume.resume", read_only=True)
     status = serializers.CharField(source="get_status_display", read_only=True)
     user = UserSerializer()
@@ -1,20 +1,231 @@
-from dotenv import load_dotenv
+import asyncio
+import threading
+import time
+
+import httpx
 import requests
-import json
-import os
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# statuses worth retrying: rate limiting and server side failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AIDetectionUnavailable(Exception):
+    """
+    The detection service failed, or its circuit breaker is open.
+    `retry_after` is the number of seconds before trying again is worth it.
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Breaker shared by every worker through the cache. After `threshold`
+    failed calls in a row it opens, and calls fail fast for `cooldown`
+    seconds; then calls go through again, but a single failure reopens it
+    until a success resets the count.
+    """
+
+    def __init__(self, name, threshold, cooldown):
+        self.failures_key = f"circuit:{name}:failures"
+        self.open_key = f"circuit:{name}:open-until"
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+    def retry_after(self):
+        open_until = cache.get(self.open_key)
+        return max(0, open_until - time.time()) if open_until else 0
+
+    def check(self):
+        retry_after = self.retry_after()
+        if retry_after:
+            raise AIDetectionUnavailable("circuit breaker is open", retry_after)
+
+    def record_success(self):
+        cache.delete(self.failures_key)
+
+    def record_failure(self):
+        cache.add(self.failures_key, 0, timeout=None)
+        if cache.incr(self.failures_key) >= self.threshold:
+            cache.set(self.open_key, time.time() + self.cooldown, timeout=self.cooldown)
+
 
-load_dotenv()
+def zerogpt_breaker():
+    return CircuitBreaker(
+        "zerogpt",
+        settings.ZERO_GPT_BREAKER_THRESHOLD,
+        settings.ZERO_GPT_BREAKER_COOLDOWN,
+    )
 
 
-def is_ai_generated_report(text: str) -> bool:
+class ZeroGPTClient:
     """
-    Check if the text is AI-generated using the ZeroGPT API.
+    ZeroGPT API client over one keep-alive session, so a worker reuses its
+    pooled connections instead of opening a TLS connection per task. Every
+    call is bounded by connect/read timeouts; connection errors, 429 and 5xx
+    are retried with exponential backoff, and failures past the retries
+    count towards the circuit breaker.
     """
-    url = "https://api.zerogpt.com/api/detect/detectText"
-    headers = {
-        "ApiKey": os.getenv("ZERO_GPT_API_KEY"),
-        "Content-Type": "application/json",
-    }
-    payload = json.dumps({"input_text": text})
-    response = requests.post(url, headers=headers, data=payload)
-    return response.json()
+
+    def __init__(
+        self,
+        url=None,
+        api_key=None,
+        timeout=None,
+        retries=None,
+        backoff_factor=0.5,
+        pool_size=None,
+        breaker=None,
+    ):
+        self.url = url or settings.ZERO_GPT_URL
+        self.timeout = timeout or settings.ZERO_GPT_TIMEOUT
+        self.breaker = breaker or zerogpt_breaker()
+        retry = Retry(
+            total=settings.ZERO_GPT_RETRIES if retries is None else retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods={"POST"},  # detection has no side effects
+            backoff_factor=backoff_factor,
+            backoff_max=10,
+            respect_retry_after_header=False,  # keep each call bounded
+            raise_on_status=False,
+        )
+        pool_size = pool_size or settings.ZERO_GPT_POOL_SIZE
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["ApiKey"] = api_key or settings.ZERO_GPT_API_KEY or ""
+
+    def detect(self, text):
+        self.breaker.check()
+        try:
+            response = self.session.post(
+                self.url, json={"input_text": text}, timeout=self.timeout
+            )
+            if response.status_code in RETRY_STATUSES:
+                response.raise_for_status()
+            report = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            self.breaker.record_failure()
+            raise AIDetectionUnavailable(
+                f"ZeroGPT request failed: {exc}",
+                self.breaker.retry_after() or self.breaker.cooldown,
+            ) from exc
+        self.breaker.record_success()
+        return report
+
+
+class AsyncZeroGPTClient:
+    """
+    Asyncio counterpart of `ZeroGPTClient` for scoring many texts at once:
+    at most `concurrency` requests in flight over one pooled connection set,
+    with the same timeouts, retries and circuit breaker. Use it as an async
+    context manager.
+    """
+
+    def __init__(
+        self,
+        url=None,
+        api_key=None,
+        timeout=None,
+        retries=None,
+        backoff_factor=0.5,
+        concurrency=None,
+        breaker=None,
+    ):
+        self.url = url or settings.ZERO_GPT_URL
+        self.api_key = api_key or settings.ZERO_GPT_API_KEY or ""
+        connect, read = timeout or settings.ZERO_GPT_TIMEOUT
+        self.timeout = httpx.Timeout(read, connect=connect)
+        self.retries = settings.ZERO_GPT_RETRIES if retries is None else retries
+        self.backoff_factor = backoff_factor
+        self.concurrency = concurrency or settings.ZERO_GPT_CONCURRENCY
+        self.breaker = breaker or zerogpt_breaker()
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.http = httpx.AsyncClient(
+            headers={"ApiKey": self.api_key},
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.http.aclose()
+
+    async def _post(self, text):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(min(10, self.backoff_factor * 2 ** (attempt - 1)))
+            try:
+                response = await self.http.post(self.url, json={"input_text": text})
+            except httpx.TransportError as exc:
+                error = exc
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                return response.json()
+            error = httpx.HTTPStatusError(
+                f"ZeroGPT answered {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+        raise error
+
+    async def detect(self, text):
+        async with self.semaphore:
+            self.breaker.check()
+            try:
+                report = await self._post(text)
+            except (httpx.HTTPError, ValueError) as exc:
+                self.breaker.record_failure()
+                raise AIDetectionUnavailable(
+                    f"ZeroGPT request failed: {exc}",
+                    self.breaker.retry_after() or self.breaker.cooldown,
+                ) from exc
+            self.breaker.record_success()
+            return report
+
+    async def detect_many(self, texts):
+        """
+        Reports of `{key: text}` as `{key: report}`, leaving out the texts
+        that could not be scored.
+        """
+        keys = list(texts)
+        reports = await asyncio.gather(
+            *(self.detect(texts[key]) for key in keys), return_exceptions=True
+        )
+        for report in reports:
+            if isinstance(report, BaseException) and not isinstance(
+                report, AIDetectionUnavailable
+            ):
+                raise report
+        return {
+            key: report
+            for key, report in zip(keys, reports)
+            if not isinstance(report, AIDetectionUnavailable)
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_zerogpt_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ZeroGPTClient()
+    return _client
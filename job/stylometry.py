@@ -0,0 +1,111 @@
+import re
+
+import numpy as np
+from django.conf import settings
+
+SENTENCE_RE = re.compile(r"[^.!?]+")
+WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+PUNCTUATION_RE = re.compile(r"[,;:()\"—–-]")
+
+FEATURES = (
+    "lexical_diversity",  # distinct words / sqrt(words), length independent
+    "sentence_length_cv",  # spread of sentence lengths relative to their mean
+    "burstiness",  # (std - mean) / (std + mean) of sentence lengths
+    "word_length_std",
+    "punctuation_rate",  # inner punctuation marks per word
+)
+
+# Hand set, not trained: generated letters tend to have evenly sized
+# sentences (low spread and burstiness) and sparse inner punctuation, while
+# human ones vary a lot more. The features are centered on typical human
+# values and scaled by their usual spread before weighting.
+CENTER = np.array([6.0, 0.55, -0.3, 2.6, 0.12])
+SCALE = np.array([1.5, 0.2, 0.15, 0.4, 0.06])
+WEIGHTS = np.array([0.2, -1.0, -0.6, -0.2, -0.5])
+BIAS = -0.5
+
+
+def _segment_stats(values, owners, n):
+    """
+    Per owner count, mean and standard deviation of a flat array of values.
+    """
+    counts = np.bincount(owners, minlength=n)
+    safe = np.maximum(counts, 1)
+    mean = np.bincount(owners, weights=values, minlength=n) / safe
+    square = np.bincount(owners, weights=values * values, minlength=n) / safe
+    return counts, mean, np.sqrt(np.maximum(square - mean * mean, 0))
+
+
+def stylometric_features(texts):
+    """
+    `FEATURES` of each text as an (n, len(FEATURES)) array. Only the
+    tokenization loops over the texts; every statistic is computed for the
+    whole batch at once from flat arrays of sentence and word lengths.
+    """
+    n = len(texts)
+    sentence_lengths, sentence_owners = [], []
+    word_lengths, word_owners = [], []
+    distinct = np.zeros(n)
+    punctuation = np.zeros(n)
+    for i, text in enumerate(texts):
+        for sentence in SENTENCE_RE.findall(text):
+            words = WORD_RE.findall(sentence)
+            if words:
+                sentence_lengths.append(len(words))
+                sentence_owners.append(i)
+                word_lengths.extend(map(len, words))
+                word_owners.extend([i] * len(words))
+        distinct[i] = len(set(WORD_RE.findall(text.lower())))
+        punctuation[i] = len(PUNCTUATION_RE.findall(text))
+
+    sentence_owners = np.array(sentence_owners, dtype=np.int64)
+    word_owners = np.array(word_owners, dtype=np.int64)
+    _, sentence_mean, sentence_std = _segment_stats(
+        np.array(sentence_lengths, dtype=float), sentence_owners, n
+    )
+    words, _, word_std = _segment_stats(
+        np.array(word_lengths, dtype=float), word_owners, n
+    )
+    words = np.maximum(words, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.column_stack(
+            [
+                distinct / np.sqrt(words),
+                np.nan_to_num(sentence_std / sentence_mean),
+                np.nan_to_num(
+                    (sentence_std - sentence_mean) / (sentence_std + sentence_mean),
+                    nan=-1.0,
+                ),
+                word_std,
+                punctuation / words,
+            ]
+        )
+
+
+def local_scores(texts):
+    """
+    Preliminary percentage of each text looking AI generated, from its
+    stylometric features alone.
+    """
+    if not len(texts):
+        return np.empty(0)
+    features = stylometric_features(texts)
+    logits = ((features - CENTER) / SCALE) @ WEIGHTS + BIAS
+    return np.round(100 / (1 + np.exp(-logits)), 2)
+
+
+def needs_remote(scores):
+    """
+    Mask of the scores the pre-filter cannot settle, which still need the
+    remote detector: anything not clearly human. A high local score is
+    never final, as plainly written human letters can get one too.
+    """
+    return scores > settings.AI_PREFILTER_HUMAN_MAX
+
+
+def local_report(score):
+    """
+    Report of a letter the pre-filter found human, shaped like ZeroGPT's so
+    `report_score` reads both.
+    """
+    return {"success": True, "source": "local", "data": {"fakePercentage": score}}
@@ -1,16 +1,33 @@
+import time
+
 from celery import shared_task
 from .models import JobApplication
-from .services import is_ai_generated_report
+from .services import zerogpt_breaker
+from .detection import (
+    PENDING_DETECTION,
+    record_drain,
+    schedule_pending_scoring,
+    score_pending_applications,
+)
+from .counters import flush_applicant_counts
+
+
+@shared_task
+def flush_applicant_counts_task():
+    return flush_applicant_counts()
 
 
 @shared_task
-def is_cover_letter_ai_generated_task(job_application_id):
-    job_application = JobApplication.objects.get(id=job_application_id)
-    if len(job_application.cover_letter.split()) > 30:
-        is_ai = is_ai_generated_report(job_application.cover_letter)
-        job_application.is_cover_letter_ai_report = is_ai
-        if is_ai["success"]:
-            job_application.is_cover_letter_ai_generated = is_ai["data"][
-                "fakePercentage"
-            ]
-        job_application.save()
+def score_pending_applications_task(using="default"):
+    started = time.perf_counter()
+    scored = score_pending_applications(using=using)
+    record_drain(using, time.perf_counter() - started, scored)
+    # ZeroGPT is down: drain again as soon as the breaker lets calls
+    # through, instead of holding a worker or waiting for the next beat
+    retry_after = zerogpt_breaker().retry_after()
+    if (
+        retry_after
+        and JobApplication.objects.using(using).filter(PENDING_DETECTION).exists()
+    ):
+        schedule_pending_scoring(using, countdown=retry_after)
+    return scored
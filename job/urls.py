@@ -4,17 +4,29 @@ from .api import (
     BookmarkDestroyAPIView,
     BookmarkListAPIView,
     JobDetailUpdateAPIView,
+    JobSearchAPIView,
+    RecommendedJobsAPIView,
     JobCreateAPIView,
     JobApplicationAPIView,
     JobApplicationListAPIView,
     JobApplicationUpdateAPIView,
     ListJobApplicationsAPIView,
+    JobApplicationBulkStatusAPIView,
+    JobApplicationExportAPIView,
+    JobHiringFunnelAPIView,
+    CompanyHiringFunnelAPIView,
 )
 
 urlpatterns = [
     path("bookmarks", BookmarkListAPIView.as_view(), name="list-bookmarks"),
     path("bookmark/<int:pk>", BookmarkDestroyAPIView.as_view(), name="delete-bookmark"),
     path("bookmark", BookmarkCreateAPIView.as_view(), name="create-bookmark"),
+    path("jobs", JobSearchAPIView.as_view(), name="job-search"),
+    path(
+        "jobs/recommended",
+        RecommendedJobsAPIView.as_view(),
+        name="recommended-jobs",
+    ),
     path("job/<int:pk>", JobDetailUpdateAPIView.as_view(), name="job-detail-update"),
     path("job", JobCreateAPIView.as_view(), name="job-create"),
     path("job/apply", JobApplicationAPIView.as_view(), name="apply-job"),
@@ -33,4 +45,24 @@ urlpatterns = [
         ListJobApplicationsAPIView.as_view(),
         name="list-job-applications",
     ),
+    path(
+        "job/<int:pk>/applications/export",
+        JobApplicationExportAPIView.as_view(),
+        name="export-job-applications",
+    ),
+    path(
+        "job/<int:pk>/applications/bulk-status",
+        JobApplicationBulkStatusAPIView.as_view(),
+        name="bulk-update-job-applications-status",
+    ),
+    path(
+        "job/<int:pk>/funnel",
+        JobHiringFunnelAPIView.as_view(),
+        name="job-hiring-funnel",
+    ),
+    path(
+        "company/<int:pk>/funnel",
+        CompanyHiringFunnelAPIView.as_view(),
+        name="company-hiring-funnel",
+    ),
 ]
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ZeroGPTStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats["connections"] += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        code, reply, headers = self.server.reply(body)
+        payload = json.dumps(reply).encode()
+        self.send_response(code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class ZeroGPTStubServer(ThreadingHTTPServer):
+    """
+    Local stand-in for ZeroGPT's `detectText` endpoint, to measure the
+    detection pipeline without paying for the API. Replies take `latency`
+    seconds (give or take `jitter`), fail with a 5xx at `error_rate`, and
+    requests beyond `rate_limit` per second get a 429. Scores are derived
+    from the text, so the same letter always gets the same one, unless a
+    fixed `report` is set. Tests can queue `(status, delay)` replies for the
+    next requests in `replies`.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        latency=0.2,
+        jitter=0.05,
+        error_rate=0.0,
+        rate_limit=None,
+        seed=None,
+        report=None,
+    ):
+        super().__init__(address, ZeroGPTStubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.report = report
+        self.replies = []
+        self.in_flight = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = rate_limit or 0
+        self.refilled_at = time.monotonic()
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "throttled": 0,
+            "connections": 0,
+            "peak": 0,  # most requests in flight at once
+        }
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/detect/detectText"
+
+    def _take_token(self):
+        """
+        Token bucket holding up to one second worth of requests.
+        """
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self.tokens = min(
+            self.rate_limit, self.tokens + (now - self.refilled_at) * self.rate_limit
+        )
+        self.refilled_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def reply(self, body):
+        """
+        `(status, body, headers)` of the reply to a request.
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.replies:
+                code, delay = self.replies.pop(0)
+            elif not self._take_token():
+                self.stats["throttled"] += 1
+                return (
+                    429,
+                    {"success": False, "message": "Too many requests"},
+                    {"Retry-After": "1"},
+                )
+            else:
+                delay = max(0, self.random.gauss(self.latency, self.jitter))
+                code = 503 if self.random.random() < self.error_rate else 200
+            if code >= 500:
+                self.stats["errors"] += 1
+            self.in_flight += 1
+            self.stats["peak"] = max(self.stats["peak"], self.in_flight)
+        time.sleep(delay)
+        with self.lock:
+            self.in_flight -= 1
+        if code != 200:
+            return code, {"success": False, "message": "Service unavailable"}, {}
+        if self.report is not None:
+            return code, self.report, {}
+
+        text = json.loads(body or b"{}").get("input_text", "")
+        digest = hashlib.sha256(text.encode()).digest()
+        fake = round(int.from_bytes(digest[:2], "big") / 65535 * 100, 2)
+        return (
+            200,
+            {
+                "success": True,
+                "code": 200,
+                "message": "detection complete",
+                "data": {
+                    "fakePercentage": fake,
+                    "isHuman": round(100 - fake, 2),
+                    "textWords": len(text.split()),
+                    "aiWords": round(len(text.split()) * fake / 100),
+                },
+            },
+            {},
+        )
+
+    def handle_error(self, request, client_address):
+        pass  # clients giving up on slow replies
+
+    def start(self):
+        """
+        Serve from a background thread, returning the endpoint URL.
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
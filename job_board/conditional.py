@@ -0,0 +1,73 @@
+import datetime
+import hashlib
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def related_state(name, model, fk, outer_ref="pk"):
+    """
+    Annotations `<name>_updated_at` and `<name>_count`: subqueries for the
+    latest `updated_at` and the number of `model` rows pointing at the outer
+    row through `fk`. The count catches deletions, which never move the
+    latest timestamp forward.
+    """
+    rows = model.objects.filter(**{fk: OuterRef(outer_ref)}).order_by().values(fk)
+    return {
+        f"{name}_updated_at": Subquery(
+            rows.annotate(latest=Max("updated_at")).values("latest")
+        ),
+        f"{name}_count": Subquery(rows.annotate(total=Count("pk")).values("total")),
+    }
+
+
+class ConditionalRetrieveMixin:
+    """
+    Strong ETag / Last-Modified validators for `retrieve`, answering
+    conditional requests with a 304 before anything is serialized. Views
+    list the timestamps and counts the representation depends on in
+    `conditional_fields` (fields of the `queryset` rows) and
+    `conditional_annotations`, all read in one query.
+    """
+
+    conditional_fields = ("updated_at",)
+    conditional_annotations = {}
+
+    def get_conditional_state(self, pk):
+        """
+        Flat dict of the validator inputs, None when the object does not
+        exist.
+        """
+        return (
+            self.queryset.filter(**{self.lookup_field: pk})
+            .annotate(**self.conditional_annotations)
+            .values(*self.conditional_fields, *self.conditional_annotations)
+            .first()
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        state = self.get_conditional_state(
+            kwargs[self.lookup_url_kwarg or self.lookup_field]
+        )
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        fingerprint = repr(sorted(state.items())).encode()
+        etag = quote_etag(hashlib.sha256(fingerprint).hexdigest()[:32])
+        last_modified = int(
+            max(
+                value
+                for value in state.values()
+                if isinstance(value, datetime.datetime)
+            ).timestamp()
+        )
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -0,0 +1,167 @@
+import binascii
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keep full microsecond precision; DjangoJSONEncoder rounds datetimes to
+    milliseconds, which would make the cursor land before its own row.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on every field of `ordering` instead of only the
+    first one, so pages are fetched with a `WHERE (a, b) > (x, y)` style seek
+    and never need an OFFSET or a COUNT(*).
+
+    The cursor is an opaque base64 token holding the ordering values of the
+    row the page starts after. Nullable ordering fields follow PostgreSQL's
+    default NULLS LAST (ascending) / NULLS FIRST (descending) placement.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self._seek_filter(queryset.model, ordering, position)
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            reverse = bool(tokens.get("r", False))
+            position = tokens["p"]
+        except (TypeError, ValueError, KeyError, AttributeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": cursor.position}
+        if cursor.reverse:
+            tokens["r"] = 1
+        payload = json.dumps(tokens, cls=CursorEncoder, separators=(",", ":"))
+        encoded = urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return [getattr(instance, order.lstrip("-")) for order in ordering]
+
+    def _seek_filter(self, model, ordering, position):
+        """
+        Rows strictly after `position` in `ordering`:
+        a > x OR (a = x AND b > y) OR ...
+        """
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        branches = []
+        equal = Q()
+        for order, raw_value in zip(ordering, position):
+            name = order.lstrip("-")
+            field = model._meta.get_field(name)
+            try:
+                value = None if raw_value is None else field.to_python(raw_value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+            beyond = self._beyond(field, value, descending=order.startswith("-"))
+            if beyond is not None:
+                branches.append(equal & beyond)
+            if value is None:
+                equal &= Q(**{f"{name}__isnull": True})
+            else:
+                equal &= Q(**{name: value})
+
+        if not branches:
+            return Q(pk__in=[])
+        seek = reduce(or_, branches)
+
+        # Repeat the leading bound on its own so the composite index is
+        # entered at the cursor instead of filtering from its start.
+        leading = model._meta.get_field(ordering[0].lstrip("-"))
+        if not leading.null and position[0] is not None:
+            lookup = "lte" if ordering[0].startswith("-") else "gte"
+            seek &= Q(**{f"{leading.name}__{lookup}": leading.to_python(position[0])})
+        return seek
+
+    @staticmethod
+    def _beyond(field, value, descending):
+        name = field.name
+        if descending:
+            if value is None:
+                return Q(**{f"{name}__isnull": False})
+            return Q(**{f"{name}__lt": value})
+        if value is None:
+            return None
+        beyond = Q(**{f"{name}__gt": value})
+        if field.null:
+            beyond |= Q(**{f"{name}__isnull": True})
+        return beyond
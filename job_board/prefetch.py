@@ -0,0 +1,46 @@
+import copy
+
+from django.db.models import Prefetch
+
+
+class PrefetchPlanMixin:
+    """
+    Serializer mixin declaring the `select_related` / `prefetch_related`
+    lookups its output reads, nested serializers included, so a view can load
+    everything up front instead of issuing one query per related row. `only`
+    optionally narrows the columns loaded when the output reads few of them.
+    """
+
+    select_related = ()
+    prefetch_related = ()
+    only = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related:
+            queryset = queryset.select_related(*cls.select_related)
+        if cls.prefetch_related:
+            queryset = queryset.prefetch_related(
+                *(
+                    copy.copy(lookup) if isinstance(lookup, Prefetch) else lookup
+                    for lookup in cls.prefetch_related
+                )
+            )
+        if cls.only:
+            queryset = queryset.only(*cls.only)
+        return queryset
+
+
+class PrefetchPlanViewMixin:
+    """
+    Generic view mixin applying the prefetch plan of the serializer in use.
+    Hooked on `filter_queryset` so it also covers views overriding
+    `get_queryset`, for both list and detail endpoints.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, PrefetchPlanMixin):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
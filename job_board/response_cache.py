@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+JOB_DETAIL = "job-detail"
+COMPANY_DETAIL = "company-detail"
+
+
+def detail_cache_key(prefix, pk):
+    return f"response-cache:{prefix}:{pk}"
+
+
+def invalidate_detail(prefix, *pks):
+    """
+    Drop the cached details once the current transaction commits: dropped
+    any sooner, a concurrent GET could cache the old row again for the whole
+    timeout.
+    """
+    if pks:
+        keys = [detail_cache_key(prefix, pk) for pk in pks]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _count(prefix, counter):
+    key = f"response-cache:{prefix}:{counter}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def response_cache_stats(prefix):
+    """
+    Hit/miss counters of a cached view, e.g. `response_cache_stats(JOB_DETAIL)`.
+    """
+    keys = [f"response-cache:{prefix}:{counter}" for counter in ("hits", "misses")]
+    values = cache.get_many(keys)
+    return {key.rsplit(":", 1)[1]: values.get(key, 0) for key in keys}
+
+
+class CachedRetrieveMixin:
+    """
+    Serve `retrieve` from the cache, keyed by `cache_prefix` and the object id.
+    Entries are dropped once a change commits by `post_save` /
+    `post_delete` receivers calling `invalidate_detail`, so only views whose
+    GET output is the same for every user belong here.
+    """
+
+    cache_prefix = None
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        key = detail_cache_key(self.cache_prefix, pk)
+        data = cache.get(key)
+        if data is not None:
+            _count(self.cache_prefix, "hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        _count(self.cache_prefix, "misses")
+        response = super().retrieve(request, *args, **kwargs)
+        cache.set(key, response.data, timeout=RESPONSE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
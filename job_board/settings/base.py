@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third-party Apps
     "rest_framework",
     "rest_framework.authtoken",
@@ -106,6 +107,13 @@ DATABASES = {
         "PORT": os.getenv("DB_PORT"),
     }
 }
+# a separate, pre-created and migrated database that only
+# `manage.py benchmark_ai_detection` writes to
+DATABASES["benchmark"] = {
+    **DATABASES["default"],
+    "NAME": os.getenv("BENCHMARK_DB_NAME") or f"{os.getenv('DB_NAME')}_benchmark",
+    "TEST": {"MIRROR": "default"},
+}
 
 
 # Password validation
@@ -157,7 +165,43 @@ CELERY_RESULT_BACKEND = "redis://job_board_redis:6379/0"
 
 # celery-beat settings
 
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    "flush-job-applicant-counts": {
+        "task": "job.tasks.flush_applicant_counts_task",
+        "schedule": 30.0,
+    },
+    "score-pending-cover-letters": {
+        "task": "job.tasks.score_pending_applications_task",
+        "schedule": 60.0,
+    },
+}
+
+# ZeroGPT AI detection
+
+ZERO_GPT_API_KEY = os.getenv("ZERO_GPT_API_KEY")
+ZERO_GPT_URL = (
+    os.getenv("ZERO_GPT_URL") or "https://api.zerogpt.com/api/detect/detectText"
+)
+ZERO_GPT_TIMEOUT = (3.05, 30)  # connect, read (seconds)
+ZERO_GPT_RETRIES = 3  # on connection errors, 429 and 5xx, with backoff
+ZERO_GPT_POOL_SIZE = 10
+ZERO_GPT_CONCURRENCY = 8  # requests in flight when scoring a batch
+# local pre-filter scores at or below this are final (clearly human); higher
+# ones stay preliminary until ZeroGPT confirms them, since the pre-filter's
+# weights are hand set rather than calibrated on labelled letters
+AI_PREFILTER_HUMAN_MAX = 15
+ZERO_GPT_BREAKER_THRESHOLD = 5  # failed calls in a row opening the breaker
+ZERO_GPT_BREAKER_COOLDOWN = 60  # seconds calls fail fast once it is open
+
+# resume text extraction
+
+RESUME_MAX_BYTES = 10 * 1024 * 1024  # larger files are not parsed
+RESUME_MAX_PAGES = 20  # pages past these are ignored
+RESUME_MAX_CHARS = 100_000  # text kept per resume
+RESUME_EXTRACTION_TIMEOUT = 30  # seconds a document may take to parse
+# memory a parsing process may allocate on top of what it maps at start
+RESUME_EXTRACTION_MEMORY = 512 * 1024 * 1024
+RESUME_EXTRACTION_WORKERS = 2  # parsing processes per celery worker process
 
 # redis
 
@@ -182,7 +226,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "job_board.pagination.KeysetPagination",
 }
 
 AUTH_USER_MODEL = "users.CustomUser"
@@ -5,6 +5,7 @@ from rest_framework.generics import (
     RetrieveDestroyAPIView,
 )
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from .serializers import RegisterSerializer, UserSerializer, ResumeSerializer
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -42,6 +43,11 @@ class ResumeListCreateAPIView(ListCreateAPIView):
     def get_queryset(self):
         return super().get_queryset().filter(user=self.request.user)
 
+    def perform_create(self, serializer):
+        # the resume and its analysis task in the outbox commit together
+        with transaction.atomic():
+            super().perform_create(serializer)
+
 
 resume_create_list_api_view = ResumeListCreateAPIView.as_view()
 
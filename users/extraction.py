@@ -0,0 +1,103 @@
+import atexit
+import resource
+
+from billiard.einfo import ExceptionWithTraceback
+from billiard.exceptions import TimeLimitExceeded
+from billiard.pool import Pool
+from django.conf import settings
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+
+_pool = None
+
+
+class ResumeExtractionError(Exception):
+    """
+    The text of a resume could not be extracted; the message says why.
+    """
+
+
+def _limit_memory(limit):
+    """
+    Cap the address space of a parsing process at `limit` bytes past what
+    it maps already, so a decompression bomb ends in a MemoryError.
+    """
+    with open("/proc/self/statm") as statm:
+        mapped = int(statm.read().split()[0]) * resource.getpagesize()
+    resource.setrlimit(resource.RLIMIT_AS, (mapped + limit, mapped + limit))
+
+
+def get_extraction_pool():
+    """
+    Process pool parsing resumes, created on first use in each worker
+    process. billiard (Celery's fork of multiprocessing) kills and replaces
+    a process going over its time limit, and unlike multiprocessing lets
+    daemonic Celery workers have children.
+    """
+    global _pool
+    if _pool is None:
+        _pool = Pool(
+            settings.RESUME_EXTRACTION_WORKERS,
+            initializer=_limit_memory,
+            initargs=(settings.RESUME_EXTRACTION_MEMORY,),
+            timeout=settings.RESUME_EXTRACTION_TIMEOUT,
+            maxtasksperchild=100,
+        )
+        atexit.register(_pool.terminate)
+    return _pool
+
+
+def run_in_pool(func, *args):
+    """
+    Run `func(*args)` in the extraction pool within the time limit.
+    """
+    timeout = settings.RESUME_EXTRACTION_TIMEOUT
+    result = get_extraction_pool().apply_async(func, args, timeout=timeout)
+    try:
+        return result.get()
+    except ExceptionWithTraceback as exc:  # raised by the pool, not `func`
+        if isinstance(exc.exc, TimeLimitExceeded):
+            raise ResumeExtractionError(f"parsing took over {timeout}s") from None
+        raise
+    except MemoryError:
+        raise ResumeExtractionError("parsing went over the memory limit") from None
+
+
+def read_pdf_text(path, max_pages, max_chars):
+    """
+    Text of the first `max_pages` pages of the PDF at `path`, page by page,
+    stopping once `max_chars` characters are read.
+    """
+    parts = []
+    size = 0
+    for number, page in enumerate(PdfReader(path).pages):
+        if number == max_pages or size >= max_chars:
+            break
+        text = page.extract_text() or ""
+        parts.append(text)
+        size += len(text) + 1
+    return "\n".join(parts)[:max_chars]
+
+
+def extract_resume_text(file):
+    """
+    Text of a resume `FieldFile`, within the size, page, time and memory
+    limits of the `RESUME_*` settings.
+    """
+    try:
+        size = file.size
+    except OSError as exc:
+        raise ResumeExtractionError(f"resume file is missing: {exc}") from exc
+    if size > settings.RESUME_MAX_BYTES:
+        raise ResumeExtractionError(
+            f"resume is {size} bytes, over the {settings.RESUME_MAX_BYTES} limit"
+        )
+    try:
+        return run_in_pool(
+            read_pdf_text,
+            file.path,
+            settings.RESUME_MAX_PAGES,
+            settings.RESUME_MAX_CHARS,
+        )
+    except PyPdfError as exc:
+        raise ResumeExtractionError(f"resume is not a readable PDF: {exc}") from exc
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from users.parsing import rebuild_resume_sections
+
+
+class Command(BaseCommand):
+    help = "parse the sections and skills of the extracted resumes again"
+
+    def handle(self, *args, **kwargs):
+        parsed = rebuild_resume_sections()
+        self.stdout.write(f"Parsed {parsed} resumes")
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_resume_content"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="resume_user_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:18
+
+import users.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="resume",
+            name="resume",
+            field=models.FileField(
+                storage=users.storage.ContentAddressedStorage(), upload_to="resumes/"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(fields=["resume"], name="resume_file_idx"),
+        ),
+    ]
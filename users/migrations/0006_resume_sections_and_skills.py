@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:23
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_resume_content_addressed_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resume",
+            name="sections",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="resume",
+            name="skills",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=64),
+                blank=True,
+                default=list,
+                size=None,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["skills"], name="resume_skills_gin"
+            ),
+        ),
+    ]
@@ -1,9 +1,12 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timesince
+from .storage import resume_storage
 
 
 class CustomUserManager(BaseUserManager):
@@ -53,14 +56,28 @@ class CustomUser(AbstractUser):
 
 class Resume(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    resume = models.FileField(upload_to="resumes/")
+    # identical files share one blob, see `ContentAddressedStorage`
+    resume = models.FileField(upload_to="resumes/", storage=resume_storage)
     created_at = models.DateTimeField(auto_now_add=True)
     content = models.TextField(blank=True, null=True)
+    # parsed from `content` (see `users.parsing`): experience and education
+    # lines, and normalized skills, also kept in `skills` for filtering
+    sections = models.JSONField(blank=True, null=True)
+    skills = ArrayField(models.CharField(max_length=64), blank=True, default=list)
 
     class Meta:
         verbose_name = "Resume"
         verbose_name_plural = "Resumes"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="resume_user_keyset_idx"
+            ),
+            # resumes sharing a blob share its extracted content
+            models.Index(fields=["resume"], name="resume_file_idx"),
+            # inverted index from skills to resumes, for `skills__contains`
+            GinIndex(fields=["skills"], name="resume_skills_gin"),
+        ]
 
     @property
     def timesince(self):
@@ -70,15 +87,22 @@ class Resume(models.Model):
         return self.user.email + " - " + self.resume.name
 
 
-# import signals
-from .tasks import analyze_resume_task
-
-
 @receiver(post_save, sender=Resume)
-def fire_resume_analyzer(sender, instance, created, **kwargs):
+def fire_resume_analyzer(sender, instance, created, using, **kwargs):
     if created:
-        # call CV analysis service
-        try:
-            analyze_resume_task.delay(instance.id)
-        except Exception:
-            pass
+        from job.outbox import enqueue
+
+        # the same file uploaded before needs no parsing
+        parsed = (
+            Resume.objects.using(using)
+            .filter(resume=instance.resume.name, content__isnull=False)
+            .values("content", "sections", "skills")
+            .first()
+        )
+        if parsed is not None:
+            Resume.objects.using(using).filter(pk=instance.pk).update(**parsed)
+            for field, value in parsed.items():
+                setattr(instance, field, value)
+            return
+        # call CV analysis service once the resume is committed
+        enqueue("users.tasks.analyze_resume_task", [instance.id], using=using)
@@ -0,0 +1,155 @@
+import re
+
+MAX_SKILLS = 100
+MAX_SKILL_LENGTH = 64
+
+# section -> headings starting it, lowercased with punctuation dropped
+SECTION_HEADINGS = {
+    "experience": (
+        "experience",
+        "work experience",
+        "professional experience",
+        "employment",
+        "employment history",
+        "work history",
+    ),
+    "education": ("education", "academic background", "qualifications"),
+    "skills": (
+        "skills",
+        "technical skills",
+        "core skills",
+        "key skills",
+        "core competencies",
+        "technologies",
+        "tech stack",
+    ),
+}
+# headings of the sections we do not keep, ending the one before them
+OTHER_HEADINGS = (
+    "summary",
+    "profile",
+    "objective",
+    "about me",
+    "projects",
+    "certifications",
+    "languages",
+    "interests",
+    "hobbies",
+    "awards",
+    "publications",
+    "references",
+    "contact",
+    "volunteering",
+)
+HEADINGS = {
+    **dict.fromkeys(OTHER_HEADINGS),
+    **{
+        heading: section
+        for section, headings in SECTION_HEADINGS.items()
+        for heading in headings
+    },
+}
+
+# spellings of a skill -> the term it is indexed under
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "golang": "go",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "drf": "django rest framework",
+    "ml": "machine learning",
+}
+
+WORD_RE = re.compile(r"[a-z]+")
+BULLET_CHARS = "•·▪‣◦*-–— \t"
+SKILL_SEPARATOR_RE = re.compile(r"[,;|•·▪]|\s{2,}|\t")
+
+
+def normalize_skill(term):
+    """
+    Indexed form of a skill: lowercased, trimmed, whitespace collapsed and
+    common aliases folded, so "ReactJS" and "react" match.
+    """
+    term = " ".join(term.lower().split()).strip(BULLET_CHARS + ",;:()[]").rstrip(".")
+    return SKILL_ALIASES.get(term, term)
+
+
+def _heading(line):
+    """
+    `(section, rest)` when `line` is a section heading, possibly followed by
+    text after a colon ("Skills: Python, Django"); the section is None for
+    the headings of sections we do not keep. `(False, line)` otherwise.
+    """
+    head, _, rest = line.partition(":")
+    key = " ".join(WORD_RE.findall(head.lower()))
+    rest = rest.strip()
+    # "Languages: Python, Go" inside the skills is a label, not a heading
+    if key not in HEADINGS or (HEADINGS[key] is None and rest):
+        return False, line
+    return HEADINGS[key], rest
+
+
+def parse_skills(lines):
+    """
+    Distinct normalized skills listed in `lines`, in order, leaving out
+    items too long to be a skill rather than a sentence.
+    """
+    skills = {}
+    for line in lines:
+        for item in SKILL_SEPARATOR_RE.split(line):
+            # "Languages: Python, Go" groups skills under a label
+            skill = normalize_skill(item.rpartition(":")[2])
+            if skill and len(skill) <= MAX_SKILL_LENGTH and len(skill.split()) <= 4:
+                skills[skill] = None
+    return list(skills)[:MAX_SKILLS]
+
+
+def parse_resume(text):
+    """
+    Sections of a resume's extracted text: the lines under its experience
+    and education headings, and its normalized skills.
+    """
+    sections = {section: [] for section in SECTION_HEADINGS}
+    current = None
+    for line in (text or "").splitlines():
+        line = line.strip(BULLET_CHARS)
+        if not line:
+            continue
+        section, line = _heading(line)
+        if section is not False:
+            current = section
+            if not line:
+                continue
+        if current:
+            sections[current].append(line)
+    sections["skills"] = parse_skills(sections["skills"])
+    return sections
+
+
+def rebuild_resume_sections(batch_size=500):
+    """
+    Parse the sections and skills of every extracted resume again, e.g.
+    after changing the headings or aliases above. Returns the number of
+    resumes parsed.
+    """
+    from .models import Resume
+
+    resumes = Resume.objects.filter(content__isnull=False).only("pk", "content")
+    batch = []
+    total = 0
+    for resume in resumes.order_by("pk").iterator(chunk_size=batch_size):
+        resume.sections = parse_resume(resume.content)
+        resume.skills = resume.sections["skills"]
+        batch.append(resume)
+        if len(batch) == batch_size:
+            total += Resume.objects.bulk_update(batch, ["sections", "skills"])
+            batch = []
+    return total + Resume.objects.bulk_update(batch, ["sections", "skills"])
@@ -1,23 +1,37 @@
 from celery import shared_task
 from .models import Resume
-from pypdf import PdfReader
+from .extraction import ResumeExtractionError, extract_resume_text
+from .parsing import parse_resume
 
 
-@shared_task(bind=True)
+@shared_task
 def analyze_resume_task(resume_id):
     """
-    Task to analyze a resume.
+    Task to analyze a resume: extract its text into `content` and parse its
+    sections and skills, written once when the whole document is read.
     """
-    try:
-        resume = Resume.objects.get(id=resume_id)
-        print(f"Analyzing resume for user: {resume.user.email}")
-        reader = PdfReader(resume.resume.path)
-        for i in range(len(reader.pages)):
-            page = reader.pages[i]
-            text = page.extract_text()
-            print(f"Page {i + 1} text: {text}")
-            resume.content += text + "\n"
-        resume.save()
-
-    except Resume.DoesNotExist:
-        print(f"Resume with id {resume_id} does not exist.")
+    resume = Resume.objects.filter(id=resume_id).first()
+    if resume is None:
+        return "resume was deleted"
+    if resume.content is not None:
+        return "resume was analyzed already"
+    # uploads of the same file share its blob, so they share the text too
+    same_file = Resume.objects.filter(resume=resume.resume.name)
+    parsed = (
+        same_file.filter(content__isnull=False)
+        .values("content", "sections", "skills")
+        .first()
+    )
+    if parsed is None:
+        try:
+            content = extract_resume_text(resume.resume)
+        except ResumeExtractionError as exc:
+            return str(exc)
+        sections = parse_resume(content)
+        parsed = {
+            "content": content,
+            "sections": sections,
+            "skills": sections["skills"],
+        }
+    same_file.filter(content__isnull=True).update(**parsed)
+    return f"extracted {len(parsed['content'])} characters"
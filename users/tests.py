@@ -1,9 +1,19 @@
+import time
+from io import BytesIO
+
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
 from users.factories import ResumeFactory, UserFactory
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from django.urls import reverse
 from users.models import Resume
+from users.extraction import ResumeExtractionError, run_in_pool
+from users.tasks import analyze_resume_task
+from users.parsing import normalize_skill, parse_resume, rebuild_resume_sections
+from job.models import OutboxMessage
 
 
 User = get_user_model()
@@ -78,12 +88,19 @@ class ResumeAPITest(APITestCase):
 
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Resume.objects.count(), 3)
+        resume = Resume.objects.latest("id")
+        self.assertTrue(
+            OutboxMessage.objects.filter(
+                task="users.tasks.analyze_resume_task", args=[resume.id]
+            ).exists()
+        )
 
     def test_access_own_resumes(self):
         """Test that a user can access their own resumes"""
         response = self.client.get(reverse("users:create-list-resume"))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)  # Should only see their own resume
+        # Should only see their own resume
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_delete_own_resume(self):
         """Test that a user can delete their own resume"""
@@ -103,3 +120,178 @@ class ResumeAPITest(APITestCase):
         )
         self.assertEqual(response.status_code, 403)  # Forbidden
         self.assertEqual(Resume.objects.count(), 2)
+
+
+def pdf_with_pages(*texts):
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in texts:
+        page = writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+class ResumeExtractionTests(APITestCase):
+    def analyze(self, data):
+        resume = ResumeFactory(resume__data=data)
+        message = analyze_resume_task(resume.id)
+        resume.refresh_from_db()
+        return resume.content, message
+
+    def test_pages_are_extracted(self):
+        content, _ = self.analyze(pdf_with_pages("Python developer", "Django"))
+        self.assertEqual(content, "Python developer\nDjango")
+
+    @override_settings(RESUME_MAX_PAGES=2)
+    def test_pages_past_the_limit_are_ignored(self):
+        content, _ = self.analyze(pdf_with_pages("one", "two", "three"))
+        self.assertEqual(content, "one\ntwo")
+
+    @override_settings(RESUME_MAX_BYTES=100)
+    def test_large_files_are_not_parsed(self):
+        content, message = self.analyze(pdf_with_pages("one"))
+        self.assertIsNone(content)
+        self.assertIn("over the 100 limit", message)
+
+    def test_unreadable_files(self):
+        content, message = self.analyze(b"not a pdf")
+        self.assertIsNone(content)
+        self.assertIn("not a readable PDF", message)
+
+    def test_deleted_resume(self):
+        self.assertEqual(analyze_resume_task(0), "resume was deleted")
+
+
+class ExtractionPoolTests(SimpleTestCase):
+    @override_settings(RESUME_EXTRACTION_TIMEOUT=1)
+    def test_slow_documents_are_stopped(self):
+        started = time.monotonic()
+        with self.assertRaisesMessage(ResumeExtractionError, "took over 1s"):
+            run_in_pool(time.sleep, 10)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(run_in_pool(len, "pool still works"), 16)
+
+    def test_memory_is_capped(self):
+        with self.assertRaisesMessage(ResumeExtractionError, "memory limit"):
+            run_in_pool(bytearray, 4 * 1024**3)
+
+
+class ResumeDeduplicationTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, data, filename="cv.pdf"):
+        response = self.client.post(
+            reverse("users:create-list-resume"),
+            data={"resume": SimpleUploadedFile(filename, data)},
+        )
+        self.assertEqual(response.status_code, 201)
+        return Resume.objects.latest("id")
+
+    def test_identical_files_share_one_blob(self):
+        data = pdf_with_pages("Python developer")
+        first = self.upload(data, "cv.pdf")
+        second = self.upload(data, "CV (1).PDF")
+        other = self.upload(pdf_with_pages("Go developer"))
+        self.assertEqual(first.resume.name, second.resume.name)
+        self.assertNotEqual(first.resume.name, other.resume.name)
+        self.assertEqual(second.resume.read(), data)
+
+    def test_known_files_are_not_parsed_again(self):
+        data = pdf_with_pages("Python developer")
+        first = self.upload(data)
+        self.assertEqual(analyze_resume_task(first.id), "extracted 16 characters")
+        second = self.upload(data)
+        self.assertEqual(second.content, "Python developer")
+        self.assertFalse(OutboxMessage.objects.filter(args=[second.id]).exists())
+
+    def test_pending_copies_get_the_text_once(self):
+        data = pdf_with_pages("Python developer")
+        first, second = self.upload(data), self.upload(data)
+        analyze_resume_task(first.id)
+        second.refresh_from_db()
+        self.assertEqual(second.content, "Python developer")
+        self.assertEqual(analyze_resume_task(second.id), "resume was analyzed already")
+
+
+RESUME_TEXT = """Jane Doe
+SUMMARY
+Backend developer fond of ReactJS.
+Work Experience
+- Backend Engineer, Acme (2020-2023)
+- Built APIs with Django
+EDUCATION
+BSc Computer Science, Cairo University
+Technical Skills: Python, Django, JS;  Postgres
+Languages: Go, C++ | C#
+K8s, Docker.
+Projects
+Job board
+"""
+
+
+class ResumeParsingTests(APITestCase):
+    def test_sections(self):
+        self.assertEqual(
+            parse_resume(RESUME_TEXT),
+            {
+                "experience": [
+                    "Backend Engineer, Acme (2020-2023)",
+                    "Built APIs with Django",
+                ],
+                "education": ["BSc Computer Science, Cairo University"],
+                "skills": [
+                    "python",
+                    "django",
+                    "javascript",
+                    "postgresql",
+                    "go",
+                    "c++",
+                    "c#",
+                    "kubernetes",
+                    "docker",
+                ],
+            },
+        )
+
+    def test_normalize_skill(self):
+        self.assertEqual(normalize_skill("  React.JS "), "react")
+        self.assertEqual(normalize_skill(".NET"), ".net")
+        self.assertEqual(normalize_skill("Machine   Learning."), "machine learning")
+
+    def test_sentences_are_not_skills(self):
+        sections = parse_resume("Skills\nI am a quick learner who loves teams, SQL")
+        self.assertEqual(sections["skills"], ["sql"])
+
+    def test_task_stores_sections_and_skills(self):
+        resume = ResumeFactory(
+            resume__data=pdf_with_pages("Skills", "Python, ReactJS", "Education")
+        )
+        analyze_resume_task(resume.id)
+        resume.refresh_from_db()
+        self.assertEqual(resume.skills, ["python", "react"])
+        self.assertEqual(resume.sections["skills"], ["python", "react"])
+        self.assertTrue(Resume.objects.filter(skills__contains=["react"]).exists())
+
+    def test_rebuild(self):
+        resume = ResumeFactory(content=RESUME_TEXT)
+        ResumeFactory(resume__data=b"other file")  # not extracted yet
+        self.assertEqual(rebuild_resume_sections(batch_size=1), 1)
+        resume.refresh_from_db()
+        self.assertIn("docker", resume.skills)